@@ -272,6 +272,24 @@ else:
     EMAIL_HOST_PASSWORD = env("EMAIL_HOST_PASSWORD")
     DEFAULT_FROM_EMAIL = env("DEFAULT_EMAIL_FROM")
 
+REDIS_URL = env("REDIS_URL", default="redis://127.0.0.1:6379")
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": REDIS_URL,
+    }
+}
+
+CHANNEL_LAYERS = {
+    "default": {
+        "BACKEND": "channels_redis.core.RedisChannelLayer",
+        "CONFIG": {
+            "hosts": [REDIS_URL],
+        },
+    },
+}
+
 # Celery Configuration Options
 CELERY_BROKER_URL = "redis://127.0.0.1:6379"
 CELERY_RESULT_SERIALIZER = "json"
@@ -288,3 +306,71 @@ CORS_ALLOW_CREDENTIALS = True
 CORS_ALLOW_HEADERS = ["*"]
 CSRF_TRUSTED_ORIGINS = ["https://fntx.ai", "https://api.fntx.ai"]
 IBKR_BASE_URL = env("IBKR_BASE_URL")
+
+# Shared keep-alive connection pool used for every request to the IBKR gateway
+IBKR_HTTP_POOL_CONNECTIONS = env("IBKR_HTTP_POOL_CONNECTIONS", default=4, cast=int)
+IBKR_HTTP_POOL_SIZE = env("IBKR_HTTP_POOL_SIZE", default=20, cast=int)
+IBKR_HTTP_POOL_BLOCK = env("IBKR_HTTP_POOL_BLOCK", default=False, cast=bool)
+IBKR_HTTP_CONNECT_TIMEOUT = env("IBKR_HTTP_CONNECT_TIMEOUT", default=3.05, cast=float)
+IBKR_HTTP_READ_TIMEOUT = env("IBKR_HTTP_READ_TIMEOUT", default=30, cast=float)
+# Maximum number of conids sent in one /iserver/marketdata/snapshot request
+IBKR_SNAPSHOT_MAX_CONIDS = env("IBKR_SNAPSHOT_MAX_CONIDS", default=50, cast=int)
+
+# Shared market data feeds: lease held by the polling worker and lifetime of the last published frame
+FEED_LEASE_SECONDS = env("FEED_LEASE_SECONDS", default=6, cast=int)
+FEED_LATEST_TTL = env("FEED_LATEST_TTL", default=60, cast=int)
+# Maximum option chain frames per second sent to one websocket
+OPTION_CHAIN_MAX_FPS = env("OPTION_CHAIN_MAX_FPS", default=4, cast=float)
+# Seconds between snapshot polls of a shared contract price feed
+PRICE_FEED_INTERVAL = env("PRICE_FEED_INTERVAL", default=1, cast=float)
+# Strikes validated against /iserver/secdef/info in parallel while building a chain
+IBKR_STRIKE_VALIDATION_CONCURRENCY = env("IBKR_STRIKE_VALIDATION_CONCURRENCY", default=8, cast=int)
+# Token buckets shared through Redis, as (requests per second, burst) for the whole
+# gateway ("global") and per endpoint prefix. High priority callers wait up to
+# IBKR_PACING_MAX_WAIT seconds for a token, pollers fail fast.
+IBKR_RATE_LIMITS = {
+    "global": (10, 10),
+    "/iserver/marketdata/snapshot": (10, 10),
+    "/iserver/marketdata/history": (5, 5),
+    "/iserver/account/orders": (0.2, 1),
+    "/portfolio/accounts": (0.2, 1),
+    "/tickle": (1, 1),
+}
+IBKR_PACING_MAX_WAIT = env("IBKR_PACING_MAX_WAIT", default=5, cast=float)
+# Share of the global rate and burst that pollers may use (6 requests per second by default)
+IBKR_PACING_LOW_PRIORITY_SHARE = env("IBKR_PACING_LOW_PRIORITY_SHARE", default=0.6, cast=float)
+# Poll intervals of a shared option chain, sized so that a chain (live data ~1 req/s,
+# last-day price ~0.5 req/s, strikes 0.2 req/s) and a few price feeds (1 req/s each)
+# fit in the poller share above. Strike validation waits for tokens within that share.
+OPTION_CHAIN_LIVE_DATA_INTERVAL = env("OPTION_CHAIN_LIVE_DATA_INTERVAL", default=1, cast=float)
+OPTION_CHAIN_PRICE_INTERVAL = env("OPTION_CHAIN_PRICE_INTERVAL", default=2, cast=float)
+IBKR_STRIKE_REFRESH_INTERVAL = env("IBKR_STRIKE_REFRESH_INTERVAL", default=5, cast=float)
+# Seconds a gateway /iserver/auth/status result is shared between views and consumers
+IBKR_AUTH_CACHE_TTL = env("IBKR_AUTH_CACHE_TTL", default=10, cast=int)
+# run_session_keeper checks the gateway session every IBKR_SESSION_KEEPER_INTERVAL seconds
+# (below IBKR_AUTH_CACHE_TTL, so the shared auth state stays warm) and tickles it every IBKR_TICKLE_INTERVAL seconds
+IBKR_SESSION_KEEPER_INTERVAL = env("IBKR_SESSION_KEEPER_INTERVAL", default=5, cast=int)
+IBKR_TICKLE_INTERVAL = env("IBKR_TICKLE_INTERVAL", default=60, cast=int)
+# Longest run_timer_scheduler sleeps before picking up newly created timers
+IBKR_TIMER_SCHEDULER_MAX_SLEEP = env("IBKR_TIMER_SCHEDULER_MAX_SLEEP", default=1, cast=float)
+# Customer order ids each worker reserves from the shared Redis counter at a time, and the
+# margin added above the highest saved id when the counter has to be seeded from the database
+IBKR_ORDER_ID_BLOCK_SIZE = env("IBKR_ORDER_ID_BLOCK_SIZE", default=20, cast=int)
+IBKR_ORDER_ID_SEED_GAP = env("IBKR_ORDER_ID_SEED_GAP", default=1000, cast=int)
+# Order brackets of one place_orders_task submitted to the gateway in parallel
+IBKR_ORDER_SUBMIT_CONCURRENCY = env("IBKR_ORDER_SUBMIT_CONCURRENCY", default=4, cast=int)
+# Lifetime of values cached for one gateway session (suppressed questions, accounts), the
+# session epoch already separates them between sessions
+IBKR_SESSION_CACHE_TTL = env("IBKR_SESSION_CACHE_TTL", default=24 * 60 * 60, cast=int)
+# Precautionary order messages suppressed once per gateway session through /iserver/questions/suppress
+IBKR_SUPPRESSED_ORDER_MESSAGES = env.list("IBKR_SUPPRESSED_ORDER_MESSAGES", default=[
+    "o163", "o354", "o382", "o383", "o451", "o2136", "o2137", "o2165", "o10082", "o10138",
+    "o10151", "o10153", "o10164", "o10223", "o10288", "o10331", "o10332", "o10333", "o10334",
+])
+# Seconds between /iserver/account/orders reconciliation passes (IBKR allows one call every 5 seconds)
+IBKR_ORDER_RECONCILE_INTERVAL = env("IBKR_ORDER_RECONCILE_INTERVAL", default=5, cast=float)
+# Seconds a conid counts as subscribed on the gateway after a snapshot returned its price
+IBKR_SNAPSHOT_SUBSCRIPTION_TTL = env("IBKR_SNAPSHOT_SUBSCRIPTION_TTL", default=60, cast=int)
+# History reads are served from the local bar store without asking the gateway for
+# the newest bars while the series was refreshed less than this many seconds ago
+BAR_STORE_REFRESH_SECONDS = env("BAR_STORE_REFRESH_SECONDS", default=60, cast=int)
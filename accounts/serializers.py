@@ -1,7 +1,5 @@
-import json
 import re
 from django.contrib.auth.hashers import make_password
-from django_celery_beat.models import PeriodicTask, IntervalSchedule
 from django.utils.translation import gettext_lazy as _lazy
 
 
@@ -108,36 +106,9 @@ class UserTokenObtainPairSerializer(TokenObtainPairSerializer):
 
         refresh = self.get_token(user)
 
-        # Check or create onboarding process entry
+        # Check or create onboarding process entry, the gateway session itself is kept alive by run_session_keeper
         onboarding_process, created = OnBoardingProcess.objects.get_or_create(user=user)
 
-        # Create periodic task
-        task_name = f"tickle_ibkr_session_user_{user.id}"
-        if not PeriodicTask.objects.filter(name=task_name).exists():
-            interval_schedule, _ = IntervalSchedule.objects.get_or_create(
-                every=3, period=IntervalSchedule.SECONDS
-            )
-
-            periodic_task = PeriodicTask.objects.create(
-                interval=interval_schedule,
-                name=task_name,
-                task="ibkr.tasks.tickle_ibkr_session",
-                enabled=True
-            )
-
-            # save the args of the task
-            args = [{"user_id": str(user.id), "task_id": periodic_task.id, "onboarding_id": str(onboarding_process.id)}]
-            periodic_task.args = json.dumps(args)
-            periodic_task.save()
-
-            # Link periodic task to the onboarding process
-            onboarding_process.periodic_task = periodic_task
-            onboarding_process.save()
-        else:
-            task = onboarding_process.periodic_task
-            task.enabled = True
-            task.save()
-
         data = {"refresh": str(refresh), "access": str(refresh.access_token), "user": {
             "username": user.username,
             "email": user.email,
@@ -0,0 +1,92 @@
+from django.conf import settings
+from django.core.cache import cache
+
+AUTH_STATUS_KEY = "ibkr:auth_status"
+
+
+def get_cached_auth_status():
+    return cache.get(AUTH_STATUS_KEY)
+
+
+async def aget_cached_auth_status():
+    return await cache.aget(AUTH_STATUS_KEY)
+
+
+def set_cached_auth_status(auth_status):
+    """
+    Store the result of an /iserver/auth/status call for IBKR_AUTH_CACHE_TTL seconds.
+    """
+    cache.set(AUTH_STATUS_KEY, auth_status, settings.IBKR_AUTH_CACHE_TTL)
+
+
+async def aset_cached_auth_status(auth_status):
+    await cache.aset(AUTH_STATUS_KEY, auth_status, settings.IBKR_AUTH_CACHE_TTL)
+
+
+def invalidate_auth_status():
+    """
+    Drop the cached state, e.g. as soon as the gateway answers 401.
+    """
+    cache.delete(AUTH_STATUS_KEY)
+
+
+async def ainvalidate_auth_status():
+    await cache.adelete(AUTH_STATUS_KEY)
+
+
+SESSION_STATE_KEY = "ibkr:session"
+SESSION_EPOCH_KEY = "ibkr:session_epoch"
+DEFAULT_SESSION_STATE = {"authenticated": False, "connected": False, "epoch": 0, "checked_at": None}
+
+
+def get_session_state():
+    """
+    Gateway session state published by the session keeper (``manage.py run_session_keeper``).
+
+    ``epoch`` is bumped every time the gateway session becomes authenticated again, so
+    anything that is only valid for one brokerage session can be keyed on it.
+    """
+    return cache.get(SESSION_STATE_KEY) or dict(DEFAULT_SESSION_STATE)
+
+
+async def aget_session_state():
+    return await cache.aget(SESSION_STATE_KEY) or dict(DEFAULT_SESSION_STATE)
+
+
+def set_session_state(session_state):
+    cache.set(SESSION_STATE_KEY, session_state, None)
+
+
+def get_session_epoch():
+    """
+    Number of the current gateway session, bumped on every (re)authentication.
+    """
+    return cache.get(SESSION_EPOCH_KEY, 0)
+
+
+async def aget_session_epoch():
+    return await cache.aget(SESSION_EPOCH_KEY, 0)
+
+
+def bump_session_epoch():
+    """
+    Start a new gateway session, which drops everything cached under the previous epoch.
+    """
+    cache.add(SESSION_EPOCH_KEY, 0, None)
+    return cache.incr(SESSION_EPOCH_KEY)
+
+
+async def abump_session_epoch():
+    await cache.aadd(SESSION_EPOCH_KEY, 0, None)
+    return await cache.aincr(SESSION_EPOCH_KEY)
+
+
+def session_cache_key(name):
+    """
+    Cache key of ``name`` that is only valid for the current gateway session.
+    """
+    return f"ibkr:session:{get_session_epoch()}:{name}"
+
+
+async def asession_cache_key(name):
+    return f"ibkr:session:{await aget_session_epoch()}:{name}"
@@ -1,8 +1,6 @@
-import asyncio
+import copy
 import json
-from datetime import datetime
 
-import requests
 from channels.exceptions import StopConsumer
 
 from channels.generic.websocket import AsyncWebsocketConsumer
@@ -13,22 +11,30 @@ from django.utils.timezone import now
 from accounts.models import CustomUser
 from django.contrib.auth.models import AnonymousUser
 from channels.db import database_sync_to_async
+from django.conf import settings
 
 from ibkr.models import SystemData
-from .views import IBKRBase
+from .feeds import hub
+from .option_chain import OptionChainFeed, apply_chain_delta
+from .outbound import CoalescingSender
+from .views import AsyncIBKRBase
 
 
 class BaseConsumer(AsyncWebsocketConsumer):
     def __init__(self, *args, **kwargs):
-        self.ibkr = IBKRBase()
+        self.ibkr = AsyncIBKRBase()
         self.userObj = None
         self.keep_running = False
         self.month = None
-        self.last_day_price = None
-        self.update_last_price_task = None
-        self.update_live_data_task = None
-        self.strike_data_list = []
-
+        self.feed_groups = set()
+        self.option_chain_feed = None
+        self.option_chain_mode = "full"
+        self.option_chain = {}
+        self.option_chain_seq = 0
+        self.option_chain_sent_seq = 0
+        self.pending_changed = {}
+        self.pending_removed = set()
+        self.option_chain_sender = None
 
         super().__init__(*args, **kwargs)
 
@@ -53,16 +59,16 @@ class BaseConsumer(AsyncWebsocketConsumer):
     async def disconnect(self, code):
         self.keep_running = False
 
-        if self.update_last_price_task:
-            self.update_last_price_task.cancel()
-        if self.update_live_data_task:
-            self.update_live_data_task.cancel()
+        if self.option_chain_sender:
+            self.option_chain_sender.close()
+        for group_name in list(self.feed_groups):
+            await self.unsubscribe_feed(group_name)
 
         await self.close()
         raise StopConsumer()
 
     async def ticker_contract(self, ticker):
-        contracts = self.ibkr.get_spy_conId(ticker)
+        contracts = await self.ibkr.get_spy_conId(ticker)
         if contracts.get('success'):
             for contract in contracts.get('data'):
                 for section in contract.get('sections', []):
@@ -75,151 +81,146 @@ class BaseConsumer(AsyncWebsocketConsumer):
 
         return None, None
 
-    async def fetch_strike_info(self, contract_id, strike_price, strike_type):
+    async def subscribe_feed(self, feed, prime=True):
         """
-        Fetch detailed information for a strike from the IBKR API.
+        Join the feed's channel group and, unless ``prime`` is False, send its latest frame.
         """
-        try:
-            return self.ibkr.strike_info(contract_id, strike_price, strike_type, self.month)
-        except Exception as e:
-            print(f"Error fetching info for strike {strike_price}: {e}")
-            return None
+        await self.channel_layer.group_add(feed.group_name, self.channel_name)
+        hub.subscribe(feed)
+        self.feed_groups.add(feed.group_name)
 
-    async def fetch_live_data(self, conid):
-        """
-        Fetch live data for a given conid.
-        """
-        try:
-            response = requests.get(
-                f"{self.ibkr.ibkr_base_url}/iserver/marketdata/snapshot?conids={conid}&fields=31,82,83,87,7086,7638,7282",
-                verify=False,
-            )
-            if response.status_code == 200:
-                return response.json()
-        except Exception as e:
-            print(f"Error fetching live data for conid {conid}: {e}")
+        if prime:
+            latest = await feed.latest()
+            if latest:
+                await self.send(text_data=json.dumps(latest))
 
-        return None
+    async def unsubscribe_feed(self, group_name):
+        if group_name not in self.feed_groups:
+            return
+        self.feed_groups.discard(group_name)
+        hub.unsubscribe(group_name)
+        await self.channel_layer.group_discard(group_name, self.channel_name)
 
-    async def fetch_and_validate_strikes(self, contract_id):
+    async def feed_message(self, event):
         """
-        Calculate valid strikes based on the last-day price and fetch live data for these strikes.
+        Forward a frame published by a shared feed.
         """
-        while self.keep_running:
-            if not self.last_day_price:
-                await asyncio.sleep(0.1)
-                continue
-
-            else:
-                range_count = 20
-
-                # Simulate fetching strikes from IBKR
-                all_strikes = self.ibkr.fetch_strikes(contract_id, self.month)
-                if not all_strikes.get('success'):
-                    return
-
-                strikes_response = all_strikes.get('data')
-                all_call_strikes = strikes_response.get("call", [])
-                all_put_strikes = strikes_response.get("put", [])
-
-                call_strikes = [strike for strike in all_call_strikes if strike >= self.last_day_price][:range_count]
-                put_strikes = [strike for strike in all_put_strikes if strike <= self.last_day_price][-range_count:]
-
-                valid_strikes = set(call_strikes + put_strikes)
-                # Convert self.strike_data_list to a dictionary for easy updates
-                current_strike_data = {entry["strike"]: entry for entry in self.strike_data_list}
+        await self.send(text_data=json.dumps(event["payload"]))
 
-                for strike in valid_strikes:
-                    strike_info = None
-
-                    strike_type = "C" if strike in call_strikes else "P"
-                    strike_info_response = await self.fetch_strike_info(contract_id, strike, strike_type)
-                    if not strike_info_response.get('success'):
-                        continue
-                    data = strike_info_response.get('data')
-                    for obj in data:
-                        maturity_date = obj.get("maturityDate")
+    async def subscribe_option_chain(self, contract_id, month, mode=None):
+        """
+        Switch the socket to the shared chain of ``contract_id``.
+
+        In "full" mode (default) every update is sent as the whole chain. In "delta"
+        mode the client gets one snapshot followed by deltas carrying ``base_seq`` and
+        ``seq``; a delta applies on top of the state at ``base_seq``, and the client can
+        send {"action": "resync"} when it does not match. A changed entry marked
+        "replace" replaces the client's entry instead of being merged into it.
+        Updates are coalesced and flushed at most OPTION_CHAIN_MAX_FPS times per second.
+        """
+        if self.option_chain_feed:
+            await self.unsubscribe_feed(self.option_chain_feed.group_name)
+        if mode in ("full", "delta"):
+            self.option_chain_mode = mode
+
+        if not self.option_chain_sender:
+            self.option_chain_sender = CoalescingSender(
+                self.send, self.build_option_chain_frame, settings.OPTION_CHAIN_MAX_FPS
+            )
 
-                        if maturity_date and int(maturity_date) == int(datetime.now().strftime("%Y%m%d")):
-                            strike_info = obj
-                            break
-                    if strike_info:
-                        live_data = await self.fetch_live_data(strike_info.get("conid"))
-                        strike_entry = {
-                            "last_day_price": self.last_day_price,
-                            "strike": strike,
-                            "call" if strike_type == 'C' else "put": {
-                                "conid": strike_info.get("conid"),
-                                "desc2": strike_info.get("desc2"),
-                                "live_data": live_data,
-                            },
-                        }
-                        current_strike_data[strike] = strike_entry
+        self.option_chain_feed = OptionChainFeed(contract_id, month)
+        self.option_chain = {}
+        self.option_chain_seq = 0
+        self.option_chain_sent_seq = 0
+        self.pending_changed = {}
+        self.pending_removed = set()
+        await self.subscribe_feed(self.option_chain_feed, prime=False)
+        await self.send_option_chain_snapshot()
 
-                        self.strike_data_list = sorted(current_strike_data.values(), key=lambda x: x["strike"])
+    async def send_option_chain_snapshot(self):
+        """
+        Reload the chain from the feed's stored snapshot and send it in full.
+        """
+        if not self.option_chain_feed:
+            return
+        snapshot = await self.option_chain_feed.latest()
+        if not snapshot:
+            return
 
-                        await self.send(
-                            text_data=json.dumps(
-                                {"option_chain_data": self.strike_data_list, "error": None, "authentication": True}
-                            )
-                        )
-                        await asyncio.sleep(0)
+        self.option_chain = {entry["strike"]: entry for entry in snapshot["option_chain_data"]}
+        self.option_chain_seq = snapshot["seq"]
+        self.option_chain_sent_seq = snapshot["seq"]
+        self.pending_changed = {}
+        self.pending_removed = set()
+        option_chain_data = sorted(self.option_chain.values(), key=lambda x: x["strike"])
+        frame = {"option_chain_data": option_chain_data, "error": None, "authentication": True}
+        if self.option_chain_mode == "delta":
+            frame.update({"type": "snapshot", "seq": self.option_chain_seq})
+        await self.send(text_data=json.dumps(frame))
+
+    async def option_chain_delta(self, event):
+        """
+        Apply a chain delta from the feed and forward it in the socket's protocol mode.
+        """
+        payload = event["payload"]
+        if payload["seq"] <= self.option_chain_seq:
+            # Already part of the snapshot this socket was primed with
+            return
+        if payload["seq"] != self.option_chain_seq + 1:
+            # A frame was lost on the channel layer, start over from the stored snapshot
+            await self.send_option_chain_snapshot()
+            return
 
-                for strike in list(current_strike_data.keys()):
-                    if strike not in valid_strikes:
-                        del current_strike_data[strike]
+        apply_chain_delta(self.option_chain, payload["changed"], payload["removed"])
+        self.option_chain_seq = payload["seq"]
 
-                self.strike_data_list = sorted(current_strike_data.values(), key=lambda x: x["strike"])
-                await asyncio.sleep(0)
+        if self.option_chain_mode == "delta":
+            # Merge into the delta waiting for the next flush
+            for strike in payload["removed"]:
+                self.pending_changed.pop(strike, None)
+                self.pending_removed.add(strike)
+            apply_chain_delta(self.pending_changed, copy.deepcopy(payload["changed"]), [], keep_replace=True)
 
+        self.option_chain_sender.mark_dirty()
 
-    async def update_last_price_periodically(self):
+    def build_option_chain_frame(self):
         """
-        Periodically fetch the last-day price and update the strike list based on the new price.
+        Build the frame flushed by the socket's sender from everything merged since the last flush.
         """
+        if self.option_chain_sent_seq == self.option_chain_seq:
+            return None
 
-        while self.keep_running:
-            contract_id = self.scope.get("contract_id")
-            if not contract_id:
-                await asyncio.sleep(0.1)
-                continue
-
-            self.last_day_price = await self.fetch_last_day_price(contract_id)
-            await asyncio.sleep(0.5)
-
+        if self.option_chain_mode == "delta":
+            frame = {
+                "type": "delta",
+                "base_seq": self.option_chain_sent_seq,
+                "seq": self.option_chain_seq,
+                "changed": list(self.pending_changed.values()),
+                "removed": list(self.pending_removed),
+                "error": None,
+                "authentication": True,
+            }
+            self.pending_changed = {}
+            self.pending_removed = set()
+        else:
+            option_chain_data = sorted(self.option_chain.values(), key=lambda x: x["strike"])
+            frame = {"option_chain_data": option_chain_data, "error": None, "authentication": True}
+
+        self.option_chain_sent_seq = self.option_chain_seq
+        return frame
 
     async def fetch_last_day_price(self, contract_id):
         """
         Fetch the latest last-day price from the IBKR API.
         """
         try:
-            last_day_price = self.ibkr.last_day_price(contract_id)
+            last_day_price = await self.ibkr.last_day_price(contract_id)
             return last_day_price.get('last_day_price')
         except Exception as e:
             print(f"Error fetching last day price: {e}")
 
         return None
 
-    async def update_live_data(self):
-        """
-        Periodically update live data for current strikes.
-        """
-        while self.keep_running:
-            if self.strike_data_list:
-                for strike_entry in self.strike_data_list:
-                    for option_type in ["call", "put"]:
-                        option_data = strike_entry.get(option_type)
-                        if option_data and option_data.get("conid"):
-                            live_data = await self.fetch_live_data(option_data["conid"])
-                            option_data["live_data"] = live_data if live_data else []
-                            await self.send(
-                                text_data=json.dumps(
-                                    {"option_chain_data": self.strike_data_list, "error": None, "authentication": True}
-                                )
-                            )
-                            await asyncio.sleep(0.1)
-            await asyncio.sleep(0.2)
-
     @database_sync_to_async
     def get_user_from_token(self, user_id):
         """
@@ -6,4 +6,8 @@ ACCOUNT_SUMMARY_KEYS = [
                     "availablefunds",
                     "excessliquidity",
                     "buyingpower"
-                ]
\ No newline at end of file
+                ]
+
+# Snapshot fields streamed for every option in the chain:
+# last price, bid, ask, volume, symbol, last size, mark
+LIVE_DATA_FIELDS = "31,82,83,87,7086,7638,7282"
@@ -0,0 +1,147 @@
+import asyncio
+import re
+import uuid
+
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.core.cache import cache
+
+from .pacing import PRIORITY_LOW
+from .redis_client import get_async_redis
+from .views import AsyncIBKRBase
+
+# Take the lease if it is free or renew it if we already own it.
+_ACQUIRE_LEASE = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    redis.call('expire', KEYS[1], ARGV[2])
+    return 1
+end
+if redis.call('set', KEYS[1], ARGV[1], 'NX', 'EX', ARGV[2]) then
+    return 1
+end
+return 0
+"""
+
+_RELEASE_LEASE = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+class Feed:
+    """
+    A single gateway poller whose frames are fanned out to a Channels group.
+
+    Every worker that has subscribers for a feed runs its ``run`` loop, but only
+    the worker holding the Redis lease actually polls the gateway. Gateway load
+    therefore scales with the number of distinct feeds, not connected sockets.
+    """
+    group_prefix = "feed"
+
+    def __init__(self, *key):
+        self.key = key
+        self.group_name = self.build_group_name(*key)
+        # Pollers retry on their next pass, so they never queue behind user requests
+        self.ibkr = AsyncIBKRBase(priority=PRIORITY_LOW)
+        self.channel_layer = get_channel_layer()
+
+    @classmethod
+    def build_group_name(cls, *key):
+        # Channels group names only allow ASCII alphanumerics, hyphens, underscores and periods
+        parts = [re.sub(r"[^0-9A-Za-z_-]", "-", str(part)) for part in key]
+        return ".".join([cls.group_prefix] + parts)[:99]
+
+    async def poll(self):
+        """
+        Poll the gateway forever and publish frames. Cancelled when the lease is lost.
+        """
+        raise NotImplementedError
+
+    async def publish(self, payload, snapshot=None, event_type="feed.message"):
+        """
+        Send ``payload`` to the group and remember ``snapshot`` (defaults to the payload) as the latest state.
+
+        Feeds only publish changes, so the leader keeps the latest state alive while it holds the lease.
+        """
+        await cache.aset(self._latest_key, payload if snapshot is None else snapshot, settings.FEED_LATEST_TTL)
+        await self.channel_layer.group_send(self.group_name, {"type": event_type, "payload": payload})
+
+    async def latest(self):
+        """
+        Last frame published by whichever worker owns the feed, used to prime new subscribers.
+        """
+        return await cache.aget(self._latest_key)
+
+    @property
+    def _latest_key(self):
+        return f"feed:latest:{self.group_name}"
+
+    async def run(self):
+        redis = get_async_redis()
+        lease_key = f"feed:lease:{self.group_name}"
+        token = uuid.uuid4().hex
+        lease_seconds = settings.FEED_LEASE_SECONDS
+        worker = None
+        try:
+            while True:
+                try:
+                    leader = await redis.eval(_ACQUIRE_LEASE, 1, lease_key, token, lease_seconds)
+                except Exception as e:
+                    print(f"Unable to renew lease for {self.group_name}: {e}")
+                    leader = False
+
+                if leader:
+                    try:
+                        await cache.atouch(self._latest_key, settings.FEED_LATEST_TTL)
+                    except Exception as e:
+                        print(f"Unable to refresh the latest frame of {self.group_name}: {e}")
+
+                if leader and (worker is None or worker.done()):
+                    worker = asyncio.create_task(self.poll())
+                elif not leader and worker is not None:
+                    worker.cancel()
+                    worker = None
+
+                await asyncio.sleep(lease_seconds / 3)
+        finally:
+            if worker is not None:
+                worker.cancel()
+            try:
+                await redis.eval(_RELEASE_LEASE, 1, lease_key, token)
+            except Exception:
+                pass
+
+
+class MarketDataHub:
+    """
+    Per-process registry running one ``Feed.run`` loop per group while it has local subscribers.
+    """
+    def __init__(self):
+        self._tasks = {}
+        self._subscribers = {}
+
+    def subscribe(self, feed):
+        group_name = feed.group_name
+        self._subscribers[group_name] = self._subscribers.get(group_name, 0) + 1
+
+        task = self._tasks.get(group_name)
+        if task is None or task.done():
+            self._tasks[group_name] = asyncio.create_task(feed.run())
+
+        return group_name
+
+    def unsubscribe(self, group_name):
+        count = self._subscribers.get(group_name, 0) - 1
+        if count > 0:
+            self._subscribers[group_name] = count
+            return
+
+        self._subscribers.pop(group_name, None)
+        task = self._tasks.pop(group_name, None)
+        if task:
+            task.cancel()
+
+
+hub = MarketDataHub()
@@ -0,0 +1,78 @@
+import asyncio
+import os
+import threading
+
+import httpx
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+_session = None
+_session_pid = None
+_session_lock = threading.Lock()
+
+
+def get_http_session():
+    """
+    Return the process-wide pooled session used for every call to the IBKR gateway.
+
+    The session keeps connections alive between calls so views, consumers and celery
+    tasks reuse the same TCP/TLS connections. It is rebuilt after a fork so prefork
+    workers never share sockets with their parent.
+    """
+    global _session, _session_pid
+
+    pid = os.getpid()
+    if _session is not None and _session_pid == pid:
+        return _session
+
+    with _session_lock:
+        if _session is None or _session_pid != pid:
+            session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=settings.IBKR_HTTP_POOL_CONNECTIONS,
+                pool_maxsize=settings.IBKR_HTTP_POOL_SIZE,
+                pool_block=settings.IBKR_HTTP_POOL_BLOCK,
+            )
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.verify = False
+            _session = session
+            _session_pid = pid
+
+    return _session
+
+
+def get_http_timeout():
+    """
+    (connect, read) timeout applied to every gateway request.
+    """
+    return settings.IBKR_HTTP_CONNECT_TIMEOUT, settings.IBKR_HTTP_READ_TIMEOUT
+
+
+_async_client = None
+_async_client_loop = None
+
+
+def get_async_http_client():
+    """
+    Return the pooled non-blocking client used by the websocket consumers.
+
+    httpx clients are bound to the event loop they were first used on, so a new
+    client is created whenever the running loop changes.
+    """
+    global _async_client, _async_client_loop
+
+    loop = asyncio.get_running_loop()
+    if _async_client is None or _async_client_loop is not loop or _async_client.is_closed:
+        _async_client = httpx.AsyncClient(
+            verify=False,
+            limits=httpx.Limits(
+                max_connections=settings.IBKR_HTTP_POOL_SIZE,
+                max_keepalive_connections=settings.IBKR_HTTP_POOL_SIZE,
+            ),
+            timeout=httpx.Timeout(settings.IBKR_HTTP_READ_TIMEOUT, connect=settings.IBKR_HTTP_CONNECT_TIMEOUT),
+        )
+        _async_client_loop = loop
+
+    return _async_client
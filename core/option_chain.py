@@ -0,0 +1,272 @@
+import asyncio
+import copy
+from django.conf import settings
+
+from ibkr.contract_cache import contract_resolver
+from .constants import LIVE_DATA_FIELDS
+from .feeds import Feed
+from .pacing import PRIORITY_BACKGROUND
+from .redis_client import get_async_redis
+from .views import AsyncIBKRBase
+
+
+class OptionChainFeed(Feed):
+    """
+    Shared option chain poller for one underlying contract and trading month.
+
+    Tracks the last-day price, keeps the list of valid strikes around it and
+    refreshes their live data, publishing the chain to every subscribed socket.
+    """
+    group_prefix = "option_chain"
+
+    def __init__(self, contract_id, month):
+        super().__init__(contract_id, month)
+        self.contract_id = contract_id
+        self.month = month
+        self.last_day_price = None
+        self.strike_data_list = []
+        self.seq = 0
+        self.published_chain = {}
+        self.seq_gap = 1
+        # A chain is only complete once every strike is validated, so validation waits for its tokens
+        self.validation_ibkr = AsyncIBKRBase(priority=PRIORITY_BACKGROUND)
+
+    @property
+    def _seq_key(self):
+        return f"feed:seq:{self.group_name}"
+
+    async def poll(self):
+        # Continue from the chain of the worker that owned the feed before us
+        latest = await self.latest()
+        if latest:
+            self.strike_data_list = copy.deepcopy(latest["option_chain_data"])
+            self.published_chain = {entry["strike"]: entry for entry in latest["option_chain_data"]}
+            self.seq_gap = 1
+        else:
+            # Our first delta is not based on the chain subscribers hold: skip a
+            # sequence number so they reload the snapshot instead of applying it
+            self.published_chain = {}
+            self.seq_gap = 2
+
+        await asyncio.gather(
+            self.update_last_price_periodically(),
+            self.fetch_and_validate_strikes(),
+            self.update_live_data(),
+        )
+
+    async def publish_chain(self):
+        """
+        Publish only the strikes and fields that changed since the previous frame.
+
+        The full chain is stored with its sequence number as the feed's latest
+        state, so subscribers can (re)load a snapshot and apply later deltas.
+        Sequence numbers come from a Redis counter that outlives the snapshot and
+        the lease, so they never go back when another worker takes the feed over.
+        """
+        current_chain = {entry["strike"]: entry for entry in self.strike_data_list}
+        changed, removed = diff_chain(self.published_chain, current_chain)
+        if not changed and not removed:
+            return
+
+        self.seq = await get_async_redis().incrby(self._seq_key, self.seq_gap)
+        self.seq_gap = 1
+        self.published_chain = copy.deepcopy(current_chain)
+        await self.publish(
+            {"seq": self.seq, "changed": changed, "removed": removed},
+            snapshot={"seq": self.seq, "option_chain_data": list(self.published_chain.values())},
+            event_type="option_chain.delta",
+        )
+
+    async def fetch_live_data_batch(self, conids):
+        """
+        Fetch live data for many conids at once, keyed by conid.
+        """
+        if not conids:
+            return {}
+        try:
+            response = await self.ibkr.market_snapshot(conids, LIVE_DATA_FIELDS)
+            if response.get('success'):
+                return {str(row.get("conid")): row for row in response.get('data') if row.get("conid")}
+        except Exception as e:
+            print(f"Error fetching live data for conids {conids}: {e}")
+
+        return None
+
+    async def fetch_and_validate_strikes(self):
+        """
+        Calculate valid strikes based on the last-day price and fetch live data for these strikes.
+        """
+        while True:
+            if not self.last_day_price:
+                await asyncio.sleep(0.1)
+                continue
+
+            else:
+                range_count = 20
+
+                all_strikes = await self.ibkr.fetch_strikes(self.contract_id, self.month)
+                if not all_strikes.get('success'):
+                    # Paced out or gateway error: keep the current strikes and try again on the next pass
+                    await asyncio.sleep(settings.IBKR_STRIKE_REFRESH_INTERVAL)
+                    continue
+
+                strikes_response = all_strikes.get('data')
+                all_call_strikes = strikes_response.get("call", [])
+                all_put_strikes = strikes_response.get("put", [])
+
+                call_strikes = [strike for strike in all_call_strikes if strike >= self.last_day_price][:range_count]
+                put_strikes = [strike for strike in all_put_strikes if strike <= self.last_day_price][-range_count:]
+
+                valid_strikes = set(call_strikes + put_strikes)
+                # Convert self.strike_data_list to a dictionary for easy updates
+                current_strike_data = {entry["strike"]: entry for entry in self.strike_data_list}
+
+                # Validate every strike concurrently, bounded so we stay within gateway pacing
+                semaphore = asyncio.Semaphore(settings.IBKR_STRIKE_VALIDATION_CONCURRENCY)
+                strike_types = {strike: "C" if strike in call_strikes else "P" for strike in valid_strikes}
+                strike_infos = await asyncio.gather(*[
+                    self.validate_strike(semaphore, strike, strike_type)
+                    for strike, strike_type in strike_types.items()
+                ])
+                validated = {strike: info for strike, info in zip(strike_types, strike_infos) if info}
+
+                # First snapshot for every validated contract in one batched call
+                live_data = await self.fetch_live_data_batch([info.get("conid") for info in validated.values()]) or {}
+
+                for strike, strike_info in validated.items():
+                    row = live_data.get(str(strike_info.get("conid")))
+                    current_strike_data[strike] = {
+                        "last_day_price": self.last_day_price,
+                        "strike": strike,
+                        "call" if strike_types[strike] == 'C' else "put": {
+                            "conid": strike_info.get("conid"),
+                            "desc2": strike_info.get("desc2"),
+                            "live_data": [row] if row else None,
+                        },
+                    }
+
+                for strike in list(current_strike_data.keys()):
+                    if strike not in valid_strikes:
+                        del current_strike_data[strike]
+
+                self.strike_data_list = sorted(current_strike_data.values(), key=lambda x: x["strike"])
+                await self.publish_chain()
+                await asyncio.sleep(settings.IBKR_STRIKE_REFRESH_INTERVAL)
+
+    async def validate_strike(self, semaphore, strike, strike_type):
+        """
+        Return the contract of ``strike`` expiring today, or None when it cannot be traded today.
+        """
+        async with semaphore:
+            try:
+                return await contract_resolver.aresolve(self.validation_ibkr, self.contract_id, strike, strike_type, self.month)
+            except Exception as e:
+                print(f"Error fetching info for strike {strike}: {e}")
+                return None
+
+    async def update_last_price_periodically(self):
+        """
+        Periodically fetch the last-day price so the strike list follows the underlying.
+        """
+        while True:
+            try:
+                last_day_price = await self.ibkr.last_day_price(self.contract_id)
+                # Keep the previous price through throttled or failed calls
+                if last_day_price.get('success'):
+                    self.last_day_price = last_day_price.get('last_day_price')
+            except Exception as e:
+                print(f"Error fetching last day price: {e}")
+            await asyncio.sleep(settings.OPTION_CHAIN_PRICE_INTERVAL)
+
+    async def update_live_data(self):
+        """
+        Periodically update live data for current strikes with one batched snapshot per pass.
+        """
+        while True:
+            if self.strike_data_list:
+                options = [
+                    strike_entry[option_type]
+                    for strike_entry in self.strike_data_list
+                    for option_type in ["call", "put"]
+                    if strike_entry.get(option_type) and strike_entry[option_type].get("conid")
+                ]
+                live_data = await self.fetch_live_data_batch([option_data["conid"] for option_data in options])
+                if live_data is not None:
+                    for option_data in options:
+                        row = live_data.get(str(option_data["conid"]))
+                        option_data["live_data"] = [row] if row else []
+                    await self.publish_chain()
+            await asyncio.sleep(settings.OPTION_CHAIN_LIVE_DATA_INTERVAL)
+
+
+def diff_chain(previous, current):
+    """
+    Compare two ``{strike: entry}`` chains.
+
+    Returns the changed entries, reduced to the strike plus the fields that
+    differ (one level deep for the call/put legs), and the removed strikes.
+    An entry whose fields (or a leg's fields) were added or removed, e.g. a
+    strike switching from a call to a put, is sent whole and marked "replace".
+    """
+    changed = []
+    for strike, entry in current.items():
+        old_entry = previous.get(strike)
+        if old_entry is None:
+            changed.append(copy.deepcopy(entry))
+            continue
+        if entry == old_entry:
+            continue
+
+        if _fields_removed(old_entry, entry):
+            changed.append({**copy.deepcopy(entry), "replace": True})
+            continue
+
+        fields = {}
+        for key, value in entry.items():
+            old_value = old_entry.get(key)
+            if value == old_value:
+                continue
+            if isinstance(value, dict) and isinstance(old_value, dict):
+                fields[key] = {k: copy.deepcopy(v) for k, v in value.items() if old_value.get(k) != v}
+            else:
+                fields[key] = copy.deepcopy(value)
+        changed.append({"strike": strike, **fields})
+
+    removed = [strike for strike in previous if strike not in current]
+    return changed, removed
+
+
+def _fields_removed(old_entry, entry):
+    """
+    Whether ``entry`` lacks a field of ``old_entry``, at the top level or inside a leg, which a merge cannot express.
+    """
+    for key, old_value in old_entry.items():
+        if key not in entry:
+            return True
+        value = entry[key]
+        if isinstance(value, dict) and isinstance(old_value, dict) and set(old_value) - set(value):
+            return True
+    return False
+
+
+def apply_chain_delta(chain, changed, removed, keep_replace=False):
+    """
+    Apply a delta produced by ``diff_chain`` to a ``{strike: entry}`` chain in place.
+
+    With ``keep_replace`` the "replace" marks are kept, for merging several deltas into one.
+    """
+    for strike in removed:
+        chain.pop(strike, None)
+
+    for item in changed:
+        if item.get("replace"):
+            chain[item["strike"]] = item if keep_replace else {key: value for key, value in item.items() if key != "replace"}
+            continue
+
+        entry = chain.setdefault(item["strike"], {})
+        for key, value in item.items():
+            if isinstance(value, dict) and isinstance(entry.get(key), dict):
+                entry[key].update(value)
+            else:
+                entry[key] = value
+    return chain
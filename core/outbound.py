@@ -0,0 +1,40 @@
+import asyncio
+import json
+
+
+class CoalescingSender:
+    """
+    Per-socket outbound scheduler.
+
+    Callers only mark the socket dirty; the frame is built from the latest state
+    when it is actually flushed, at most ``max_rate`` times per second. Changes that
+    arrive while a slow client is still receiving are merged into the next frame, so
+    superseded intermediate states are never sent.
+    """
+    def __init__(self, send, build_frame, max_rate):
+        self._send = send
+        self._build_frame = build_frame
+        self._interval = 1 / max_rate if max_rate else 0
+        self._dirty = asyncio.Event()
+        self._task = None
+
+    def mark_dirty(self):
+        self._dirty.set()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def close(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await self._dirty.wait()
+            self._dirty.clear()
+
+            frame = self._build_frame()
+            if frame is not None:
+                await self._send(text_data=json.dumps(frame))
+
+            await asyncio.sleep(self._interval)
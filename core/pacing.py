@@ -0,0 +1,129 @@
+import asyncio
+import logging
+import time
+from urllib.parse import urlsplit
+
+from django.conf import settings
+
+from .redis_client import get_redis, get_async_redis
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_HIGH = "high"
+PRIORITY_LOW = "low"
+# Uses the low priority budget but waits for a token like PRIORITY_HIGH
+PRIORITY_BACKGROUND = "background"
+
+# Refill every bucket from the Redis clock and take one token from all of them,
+# or none if any has no token above its reserve. Returns 0 on success, otherwise
+# milliseconds to wait.
+_TAKE_TOKENS = """
+local now = redis.call('TIME')
+local now_ms = tonumber(now[1]) * 1000 + math.floor(tonumber(now[2]) / 1000)
+local wait = 0
+local tokens = {}
+for i, key in ipairs(KEYS) do
+    local rate = tonumber(ARGV[i * 3 - 2])
+    local burst = tonumber(ARGV[i * 3 - 1])
+    local reserve = tonumber(ARGV[i * 3])
+    local bucket = redis.call('HMGET', key, 'tokens', 'ts')
+    local available = tonumber(bucket[1]) or burst
+    local ts = tonumber(bucket[2]) or now_ms
+    available = math.min(burst, available + (now_ms - ts) * rate / 1000)
+    tokens[i] = available
+    if available < 1 + reserve then
+        wait = math.max(wait, math.ceil((1 + reserve - available) * 1000 / rate))
+    end
+end
+if wait > 0 then
+    return wait
+end
+for i, key in ipairs(KEYS) do
+    local rate = tonumber(ARGV[i * 3 - 2])
+    local burst = tonumber(ARGV[i * 3 - 1])
+    redis.call('HSET', key, 'tokens', tokens[i] - 1, 'ts', now_ms)
+    redis.call('PEXPIRE', key, math.ceil(burst * 1000 / rate) + 1000)
+end
+return 0
+"""
+
+
+class GatewayPacer:
+    """
+    Token buckets in front of the IBKR gateway, shared by all workers through Redis.
+
+    Every request takes a token from the global bucket and from the bucket of the
+    longest matching endpoint prefix in IBKR_RATE_LIMITS. High priority callers wait
+    up to IBKR_PACING_MAX_WAIT seconds for a token; low priority callers (pollers
+    that will simply try again on their next pass) fail fast. Low and background
+    priority callers also yield: they only get IBKR_PACING_LOW_PRIORITY_SHARE of the
+    global rate and burst, so the rest of the global budget stays free for high
+    priority callers. Background callers wait for their token within that share.
+    If Redis is down the pacer lets requests through rather than stopping all
+    gateway traffic.
+    """
+    def _buckets(self, url, priority):
+        path = urlsplit(url).path
+        base_path = urlsplit(settings.IBKR_BASE_URL or "").path.rstrip("/")
+        if base_path and path.startswith(base_path):
+            path = path[len(base_path):]
+
+        limits = settings.IBKR_RATE_LIMITS
+        buckets = [("global", limits["global"])]
+        endpoints = [prefix for prefix in limits if prefix != "global" and path.startswith(prefix)]
+        if endpoints:
+            endpoint = max(endpoints, key=len)
+            buckets.append((endpoint, limits[endpoint]))
+
+        reserves = {}
+        if priority != PRIORITY_HIGH:
+            share = settings.IBKR_PACING_LOW_PRIORITY_SHARE
+            rate, burst = limits["global"]
+            buckets.append(("low_priority", (rate * share, max(burst * share, 1))))
+            reserves["global"] = burst * (1 - share)
+
+        keys = [f"ibkr:pacing:{name}" for name, _ in buckets]
+        args = [value for name, (rate, burst) in buckets for value in (rate, burst, reserves.get(name, 0))]
+        return keys, args
+
+    def _max_wait(self, priority):
+        return settings.IBKR_PACING_MAX_WAIT if priority in (PRIORITY_HIGH, PRIORITY_BACKGROUND) else 0
+
+    def acquire(self, url, priority=PRIORITY_HIGH):
+        """
+        Take a token for ``url``. Returns False when the caller should not send the request.
+        """
+        keys, args = self._buckets(url, priority)
+        deadline = time.monotonic() + self._max_wait(priority)
+        while True:
+            try:
+                wait = get_redis().eval(_TAKE_TOKENS, len(keys), *keys, *args) / 1000
+            except Exception as e:
+                logger.warning("IBKR pacing unavailable, sending request unpaced: %s", e)
+                return True
+            if not wait:
+                return True
+            if time.monotonic() + wait > deadline:
+                return False
+            time.sleep(wait)
+
+    async def aacquire(self, url, priority=PRIORITY_HIGH):
+        """
+        Async variant of ``acquire``.
+        """
+        keys, args = self._buckets(url, priority)
+        deadline = time.monotonic() + self._max_wait(priority)
+        while True:
+            try:
+                wait = await get_async_redis().eval(_TAKE_TOKENS, len(keys), *keys, *args) / 1000
+            except Exception as e:
+                logger.warning("IBKR pacing unavailable, sending request unpaced: %s", e)
+                return True
+            if not wait:
+                return True
+            if time.monotonic() + wait > deadline:
+                return False
+            await asyncio.sleep(wait)
+
+
+pacer = GatewayPacer()
@@ -0,0 +1,34 @@
+import asyncio
+
+from django.conf import settings
+
+from .feeds import Feed
+from .views import _parse_last_day_price
+
+
+class PriceFeed(Feed):
+    """
+    Shared last price stream for one contract.
+
+    Publishes a "price.tick" event with {"conid", "price"} whenever the snapshot
+    price changes, so every socket following the contract shares one poller.
+    """
+    group_prefix = "price"
+
+    def __init__(self, conid):
+        super().__init__(conid)
+        self.conid = conid
+
+    async def poll(self):
+        latest = await self.latest()
+        price = latest["price"] if latest else None
+        while True:
+            # The first snapshot of a contract only subscribes it; prices arrive from the next poll on
+            response = await self.ibkr.market_snapshot([self.conid], "31,7295,70")
+            if response.get("success") and response.get("data"):
+                last_price = _parse_last_day_price(response.get("data"))
+                if last_price.get("success") and last_price.get("last_day_price") != price:
+                    price = last_price.get("last_day_price")
+                    await self.publish({"conid": self.conid, "price": price}, event_type="price.tick")
+
+            await asyncio.sleep(settings.PRICE_FEED_INTERVAL)
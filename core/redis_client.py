@@ -0,0 +1,39 @@
+import asyncio
+import os
+
+import redis
+import redis.asyncio as aioredis
+from django.conf import settings
+
+_client = None
+_client_pid = None
+_async_client = None
+_async_client_loop = None
+
+
+def get_redis():
+    """
+    Return the process-wide Redis client used for state shared between workers.
+    """
+    global _client, _client_pid
+
+    pid = os.getpid()
+    if _client is None or _client_pid != pid:
+        _client = redis.Redis.from_url(settings.REDIS_URL)
+        _client_pid = pid
+
+    return _client
+
+
+def get_async_redis():
+    """
+    Return the asyncio Redis client for the running event loop.
+    """
+    global _async_client, _async_client_loop
+
+    loop = asyncio.get_running_loop()
+    if _async_client is None or _async_client_loop is not loop:
+        _async_client = aioredis.Redis.from_url(settings.REDIS_URL)
+        _async_client_loop = loop
+
+    return _async_client
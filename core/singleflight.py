@@ -0,0 +1,66 @@
+import asyncio
+import threading
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Collapse concurrent calls with the same key into one execution.
+
+    The first caller runs the function; callers arriving while it is in flight
+    block and receive the same result (or exception). Safe to share between threads.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+        return call.result
+
+
+class AsyncSingleFlight:
+    """
+    asyncio counterpart of SingleFlight: concurrent tasks awaiting the same key share one coroutine.
+
+    The shared call is shielded, so a waiter being cancelled does not cancel it for the others.
+    """
+    def __init__(self):
+        self._calls = {}
+
+    async def do(self, key, coro_fn):
+        key = (id(asyncio.get_running_loop()), key)
+        future = self._calls.get(key)
+        if future is None:
+            future = asyncio.ensure_future(coro_fn())
+            self._calls[key] = future
+            future.add_done_callback(lambda _: self._calls.pop(key, None))
+
+        return await asyncio.shield(future)
@@ -1,3 +1,56 @@
-from django.test import TestCase
+import copy
 
-# Create your tests here.
+from django.test import SimpleTestCase
+
+from .option_chain import apply_chain_delta, diff_chain
+
+
+def _leg(conid, price):
+    return {"conid": conid, "desc2": f"desc {conid}", "live_data": [{"31": price}]}
+
+
+class ChainDeltaTests(SimpleTestCase):
+    def assertRoundTrip(self, previous, current):
+        changed, removed = diff_chain(previous, current)
+        self.assertEqual(apply_chain_delta(copy.deepcopy(previous), changed, removed), current)
+        return changed, removed
+
+    def test_unchanged_chain_has_empty_delta(self):
+        chain = {500: {"strike": 500, "call": _leg(1, 1.0)}}
+        self.assertEqual(self.assertRoundTrip(chain, copy.deepcopy(chain)), ([], []))
+
+    def test_changed_leg_field_is_sent_alone(self):
+        previous = {500: {"strike": 500, "last_day_price": 499, "call": _leg(1, 1.0)}}
+        current = {500: {"strike": 500, "last_day_price": 499, "call": _leg(1, 1.5)}}
+        changed, _ = self.assertRoundTrip(previous, current)
+        self.assertEqual(changed, [{"strike": 500, "call": {"live_data": [{"31": 1.5}]}}])
+
+    def test_added_and_removed_strikes(self):
+        previous = {500: {"strike": 500, "call": _leg(1, 1.0)}}
+        current = {505: {"strike": 505, "call": _leg(2, 0.5)}}
+        _, removed = self.assertRoundTrip(previous, current)
+        self.assertEqual(removed, [500])
+
+    def test_strike_switching_from_call_to_put_is_replaced(self):
+        previous = {500: {"strike": 500, "last_day_price": 501, "call": _leg(1, 1.0)}}
+        current = {500: {"strike": 500, "last_day_price": 499, "put": _leg(2, 2.0)}}
+        changed, _ = self.assertRoundTrip(previous, current)
+        self.assertTrue(changed[0]["replace"])
+
+    def test_removed_leg_field_is_replaced(self):
+        previous = {500: {"strike": 500, "call": _leg(1, 1.0)}}
+        current = {500: {"strike": 500, "call": {"conid": 1, "live_data": None}}}
+        self.assertRoundTrip(previous, current)
+
+    def test_replace_survives_merging_later_deltas(self):
+        first = {500: {"strike": 500, "call": _leg(1, 1.0)}}
+        second = {500: {"strike": 500, "put": _leg(2, 2.0)}}
+        third = {500: {"strike": 500, "put": _leg(2, 2.5)}}
+
+        pending = {}
+        for previous, current in ((first, second), (second, third)):
+            changed, _ = diff_chain(previous, current)
+            apply_chain_delta(pending, copy.deepcopy(changed), [], keep_replace=True)
+
+        client_chain = apply_chain_delta(copy.deepcopy(first), list(pending.values()), [])
+        self.assertEqual(client_chain, third)
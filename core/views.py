@@ -1,242 +1,547 @@
-import json
+import asyncio
 import re
 import time
+from urllib.parse import urlsplit
 
+import httpx
 import requests
 from django.conf import settings
+from django.core.cache import cache
 
+from .auth_state import (get_cached_auth_status, set_cached_auth_status, invalidate_auth_status,
+                         aget_cached_auth_status, aset_cached_auth_status, ainvalidate_auth_status,
+                         bump_session_epoch, abump_session_epoch, session_cache_key, asession_cache_key)
+from .http_client import get_http_session, get_http_timeout, get_async_http_client
+from .pacing import pacer, PRIORITY_HIGH
+from .singleflight import SingleFlight, AsyncSingleFlight
+from .warmup import warmup_registry, snapshot_subscription, PORTFOLIO_ACCOUNTS
 
-class IBKRBase:
-    def __init__(self):
+THROTTLED_RESPONSE = b'{"error": "Request throttled by IBKR gateway pacing."}'
+
+# POST endpoints without side effects whose concurrent calls can share one response
+IDEMPOTENT_POSTS = ("/iserver/auth/status", "/tickle")
+
+_flight = SingleFlight()
+_async_flight = AsyncSingleFlight()
+
+
+def _flight_key(method, url, kwargs):
+    """
+    Key identifying identical read requests, or None for requests that must always be sent.
+    """
+    if kwargs.get("json") is not None or kwargs.get("data") is not None:
+        return None
+    if method == "GET" or (method == "POST" and urlsplit(url).path.endswith(IDEMPOTENT_POSTS)):
+        params = kwargs.get("params") or {}
+        return method, url, tuple(sorted((key, str(value)) for key, value in params.items()))
+    return None
+
+
+AUTH_ERROR = "Unable to authenticate with IBKR API"
+LOGIN_ERROR = "Unable to authenticate with IBKR API. Please login on client portal."
+
+
+def _json_result(response):
+    if response.status_code == 200:
+        return {"success": True, "data": response.json()}
+    return {"success": False, "status": response.status_code}
+
+
+def _json_result_with_error(response):
+    """
+    Like ``_json_result``, but a failure carries the gateway's response body as "error".
+    """
+    if response.status_code == 200:
+        return {"success": True, "data": response.json()}
+    return {"success": False, "status": response.status_code, "error": response.text}
+
+
+def _login_result(response):
+    """
+    Like ``_json_result``, but a failure asks the user to log in on the client portal.
+    """
+    if response.status_code == 200:
+        return {"success": True, "data": response.json()}
+    return {"success": False, "error": LOGIN_ERROR, "status": response.status_code}
+
+
+def _accepted_result(response):
+    if response.status_code == 200:
+        return {"success": True}
+    return {"success": False, "status": response.status_code, "error": response.text}
+
+
+def _strike_info_result(response):
+    if response.status_code != 200:
+        return {"success": False, "status": response.status_code}
+    data = response.json()
+    if data:
+        return {"success": True, "data": data}
+    return {"success": False, "status": "No data"}
+
+
+def _last_day_price_path(contract_id):
+    return f"/iserver/marketdata/snapshot?conids={contract_id}&fields=31,7295,70"
+
+
+class _IBKRGateway:
+    """
+    Gateway calls and response handling shared by IBKRBase and AsyncIBKRBase.
+
+    Subclasses only provide the transport: ``_request`` and ``_call``, which sends a request
+    and maps the response (or the transport error) to the usual result dict. ``_call`` is a
+    coroutine on AsyncIBKRBase, so the methods below return a dict on IBKRBase and an
+    awaitable on AsyncIBKRBase. Methods with steps around the gateway call are implemented
+    by each subclass.
+    """
+    def __init__(self, priority=PRIORITY_HIGH):
         self.ibkr_base_url = settings.IBKR_BASE_URL
+        self.priority = priority
 
-    def auth_status(self):
-        try:
-            response = requests.post(f"{self.ibkr_base_url}/iserver/auth/status", verify=False)
-            if response.status_code == 200:
-                return {"success": True, "data": response.json()}
-            else:
-                return {"success": False, "error": "Unable to authenticate with IBKR API. Please login on client portal.", "status": response.status_code}
-        except requests.exceptions.RequestException as e:
-            return {"success": False, "error": "Unable to authenticate with IBKR API", "status": 500}
+    def _get(self, path, read=_json_result, error=None):
+        return self._call("GET", path, read, error=error)
 
+    def _post(self, path, json=None, read=_json_result, error=None):
+        return self._call("POST", path, read, error=error, json=json)
 
-    def reauthenticate(self):
-        """
-        Handles reauthentication with the IBKR API.
-        """
-        try:
-            response = requests.post(f"{self.ibkr_base_url}/iserver/reauthenticate", verify=False)
-            if response.status_code == 200:
-                return {"success": True, "data": response.json()}
-            else:
-                return {"success": False, "status": response.status_code}
-        except requests.exceptions.RequestException as e:
-            return {"success": False, "error": str(e), "status": 500}
+    def _delete(self, path, read=_json_result, error=None):
+        return self._call("DELETE", path, read, error=error)
+
+    def _transport_error(self, e, error=None):
+        return {"success": False, "error": error or str(e), "status": 500}
 
     def brokerage_accounts(self):
         """
         Get list of all the accounts of the user
         """
-        try:
-            response = requests.get(f"{self.ibkr_base_url}/iserver/accounts", verify=False)
-            if response.status_code == 200:
-                return {"success": True, "data": response.json()}
-            else:
-                return {"success": False, "error": "Unable to authenticate with IBKR API. Please login on client portal.", "status": response.status_code}
-        except requests.exceptions.RequestException as e:
-            return {"success": False, "error": "Unable to authenticate with IBKR API", "status": 500}
-
-
-    def account_summary(self):
-        acc_response = self.brokerage_accounts()
-        if acc_response.get('success'):
-            accounts = acc_response.get('data', {}).get('accounts')
-            if accounts:
-                account = accounts[0]
-        else:
-            return {"success": False, "error": acc_response.get("error"),
-                    "status": acc_response.get("status")}
-
-        try:
-            request_url = f"{self.ibkr_base_url}/portfolio/accounts"
-            requests.get(url=request_url, verify=False)
-            time.sleep(0.5)
-            response = requests.get(f"{self.ibkr_base_url}/portfolio/{account}/summary", verify=False)
-            if response.status_code == 200:
-                return {"success": True, "data": response.json()}
-            else:
-                return {"success": False,
-                        "error": "Unable to authenticate with IBKR API. Please login on client portal.",
-                        "status": response.status_code}
-        except requests.exceptions.RequestException as e:
-            return {"success": False, "error": "Unable to authenticate with IBKR API", "status": 500}
+        return self._get("/iserver/accounts", read=_login_result, error=AUTH_ERROR)
 
     def get_spy_conId(self, symbol):
         """
         Fetch the data for a particular symbol
         """
-        try:
-            response = requests.get(f"{self.ibkr_base_url}/iserver/secdef/search?symbol={symbol}", verify=False)
-            if response.status_code == 200:
-                return {"success": True, "data": response.json()}
-            else:
-                return {"success": False, "status": response.status_code}
-        except Exception as e:
-            return {"success": False, "error": str(e), "status": 500}
-
+        return self._get(f"/iserver/secdef/search?symbol={symbol}")
 
     def fetch_strikes(self, contract_id, month):
-        try:
-            response = requests.get(f"{self.ibkr_base_url}/iserver/secdef/strikes?conid={contract_id}&sectype=OPT&month={month}", verify=False)
-            if response.status_code == 200:
-                return {"success": True, "data": response.json()}
-            else:
-                return {"success": False, "status": response.status_code}
-        except Exception as e:
-            return {"success": False, "error": str(e), "status": 500}
-
+        return self._get(f"/iserver/secdef/strikes?conid={contract_id}&sectype=OPT&month={month}")
 
     def tickle(self):
-        try:
-            response = requests.post(f"{self.ibkr_base_url}/tickle", verify=False)
-            if response.status_code == 200:
-                return {"success": True, "data": response.json()}
-            else:
-                return {"success": False, "status": response.status_code}
-        except requests.exceptions.RequestException as e:
-            return {"success": False, "error": str(e), "status": 500}
+        return self._post("/tickle")
 
     def historical_data(self, conId, bar, period=None):
         if not period:
             period = "1w"
-        try:
-            response = requests.get(f"{self.ibkr_base_url}/iserver/marketdata/history?conid={conId}&period={period}&bar={bar},", verify=False)
-            if response.status_code == 200:
-                return {"success": True, "data": response.json()}
-            else:
-                return {"success": False, "status": response.status_code, "error": response.content}
-        except requests.exceptions.RequestException as e:
-            return {"success": False, "error": str(e), "status": 500}
-
-
-    def placeOrder(self, account, order_data):
-        try:
-            url = f"{self.ibkr_base_url}/iserver/account/{account}/orders"
-            response = requests.post(url, json=order_data, verify=False)
-            if response.status_code == 200:
-                return {"success": True, "data": response.json()}
-            else:
-                return {"success": False, "status": response.status_code}
-        except requests.exceptions.RequestException as e:
-            return {"success": False, "error": str(e), "status": 500}
+        return self._get(f"/iserver/marketdata/history?conid={conId}&period={period}&bar={bar},",
+                         read=_json_result_with_error)
 
     def replyOrder(self, reply_id, json_content):
-        try:
-            url = f"{self.ibkr_base_url}/iserver/reply/{reply_id}"
-            response = requests.post(url, json=json_content, verify=False)
-            if response.status_code == 200:
-                return {"success": True, "data": response.json()}
-            else:
-                return {"success": False, "status": response.status_code, "error": response.content}
-        except requests.exceptions.RequestException as e:
-            return {"success": False, "error": str(e), "status": 500}
-
+        return self._post(f"/iserver/reply/{reply_id}", json=json_content, read=_json_result_with_error)
 
     def orderStatus(self, order_id):
-        try:
-            url = f"{self.ibkr_base_url}/iserver/account/order/status/{order_id}"
-            response = requests.get(url, verify=False)
-            print(response.text)
-            if response.status_code == 200:
-                return {"success": True, "data": response.json()}
-            else:
-                return {"success": False, "status": response.status_code, "error": response.text}
-        except requests.exceptions.RequestException as e:
-            return {"success": False, "error": str(e), "status": 500}
+        return self._get(f"/iserver/account/order/status/{order_id}", read=_json_result_with_error)
 
+    def live_orders(self):
+        """
+        All orders of the gateway session in one call. IBKR allows one request every 5 seconds.
+        """
+        return self._get("/iserver/account/orders", read=_json_result_with_error)
 
     def cancelOrder(self, order_id, account_id):
-        try:
-            url = f"{self.ibkr_base_url}/iserver/account/{account_id}/order/{order_id}"
-            response = requests.delete(url=url, verify=False)
-            if response.status_code == 200:
-                return {"success": True}
-            else:
-                return {"success": False, "status": response.status_code, "error": response.text}
-        except requests.exceptions.RequestException as e:
-            return {"success": False, "error": str(e), "status": 500}
+        return self._delete(f"/iserver/account/{account_id}/order/{order_id}", read=_accepted_result)
+
+    def strike_info(self, conid, strike, right, month):
+        return self._get(f'/iserver/secdef/info?conid={conid}&secType=OPT&month={month}&strike={strike}&right={right}',
+                         read=_strike_info_result)
 
+    @staticmethod
+    def _cacheable_auth_status(auth_status):
+        # A 401 is a valid answer too: the gateway is up but the session is not authenticated
+        return auth_status.get("success") or auth_status.get("status") == 401
 
-    def modifyOrder(self, order_id, account_id, json_content):
+    @staticmethod
+    def _first_account(acc_response):
+        """
+        First account of a brokerage_accounts response, or (None, error result).
+        """
+        if not acc_response.get("success"):
+            return None, {"success": False, "error": acc_response.get("error"), "status": acc_response.get("status")}
+        accounts = acc_response.get("data", {}).get("accounts")
+        if not accounts:
+            return None, {"success": False, "error": "No brokerage account found for the IBKR session.", "status": 404}
+        return accounts[0], None
+
+    @staticmethod
+    def _pending_reply(data):
+        """
+        Id of the question an order response is waiting on, or None once the gateway accepted the order.
+        """
+        if isinstance(data, list) and data and not data[0].get("order_id"):
+            return data[0].get("id")
+        return None
+
+    @staticmethod
+    def _confirmed_orders(data):
+        if isinstance(data, list) and data and data[0].get("order_id"):
+            return data, None
+        if isinstance(data, dict):
+            return [], data.get("error")
+        return [], data
+
+    @staticmethod
+    def _snapshot_price(data):
+        if data:
+            return _parse_last_day_price(data)
+        return {"success": False, "error": "No snapshot data for the given contract id.", "status": 500}
+
+    @staticmethod
+    def _merge_snapshots(results):
+        data = []
+        for result in results:
+            if not result.get("success"):
+                return result
+            data.extend(result.get("data"))
+        return {"success": True, "data": data}
+
+
+class IBKRBase(_IBKRGateway):
+    transport_errors = (requests.exceptions.RequestException, ValueError)
+
+    def __init__(self, priority=PRIORITY_HIGH):
+        super().__init__(priority)
+        self.http = get_http_session()
+
+    def _request(self, method, url, **kwargs):
+        """
+        Send a request to the gateway over the shared keep-alive connection pool.
+
+        Identical read requests in flight at the same time are sent once and share
+        the response. Requests are paced by the shared token buckets; when no token
+        is available in time a local 429 response is returned without touching the gateway.
+        """
+        key = _flight_key(method, url, kwargs)
+        if key is None:
+            return self._send(method, url, **kwargs)
+        return _flight.do((self.priority, key), lambda: self._send(method, url, **kwargs))
+
+    def _send(self, method, url, **kwargs):
+        if not pacer.acquire(url, self.priority):
+            response = requests.Response()
+            response.status_code = 429
+            response.url = url
+            response._content = THROTTLED_RESPONSE
+            return response
+
+        kwargs.setdefault("timeout", get_http_timeout())
+        response = self.http.request(method, url, **kwargs)
+        if response.status_code == 401:
+            invalidate_auth_status()
+        return response
+
+    def _call(self, method, path, read, error=None, json=None):
         try:
-            url = f"{self.ibkr_base_url}/iserver/account/{account_id}/order/{order_id}"
-            response = requests.post(url=url, json=json_content, verify=False)
-            if response.status_code == 200:
-                return {"success": True, "data": response.json()}
-            else:
-                return {"success": False, "status": response.status_code, "error": response.text}
-        except requests.exceptions.RequestException as e:
-            return {"success": False, "error": str(e), "status": 500}
+            return read(self._request(method, f"{self.ibkr_base_url}{path}", json=json))
+        except self.transport_errors as e:
+            return self._transport_error(e, error)
 
+    def auth_status(self):
+        auth_status = self._post("/iserver/auth/status", read=_login_result, error=AUTH_ERROR)
+        if self._cacheable_auth_status(auth_status):
+            set_cached_auth_status(auth_status)
+        return auth_status
 
-    def retrieveOrders(self):
-        try:
-            self.brokerage_accounts()
-            url = f"{self.ibkr_base_url}/iserver/account/order/status/1533705195"
-            response = requests.get(url, verify=False)
-            if response.status_code == 200:
-                return {"success": True, "data": response.json()}
-            else:
-                return {"success": False, "status": response.status_code}
-        except requests.exceptions.RequestException as e:
-            return {"success": False, "error": str(e), "status": 500}
+    def cached_auth_status(self):
+        """
+        Authentication state shared by all workers, refreshed by the session keeper.
+
+        Falls back to the gateway only when the cached state expired or was invalidated by a 401.
+        """
+        auth_status = get_cached_auth_status()
+        if auth_status is None:
+            auth_status = self.auth_status()
+        return auth_status
+
+    def reauthenticate(self):
+        """
+        Handles reauthentication with the IBKR API.
+        """
+        response = self._post("/iserver/reauthenticate")
+        if response.get("success"):
+            bump_session_epoch()
+        return response
+
+    def cached_brokerage_accounts(self):
+        """
+        Accounts of the gateway session, fetched from /iserver/accounts once per session.
 
+        The gateway also expects that call before order requests, which the first lookup of a session takes care of.
+        """
+        cache_key = session_cache_key("accounts")
+        accounts = cache.get(cache_key)
+        if accounts is not None:
+            return {"success": True, "data": accounts}
 
+        acc_response = self.brokerage_accounts()
+        if acc_response.get("success"):
+            cache.set(cache_key, acc_response.get("data"), settings.IBKR_SESSION_CACHE_TTL)
+        return acc_response
+
+    def account_summary(self):
+        account, error = self._first_account(self.cached_brokerage_accounts())
+        if error:
+            return error
+
+        if not warmup_registry.is_warm(PORTFOLIO_ACCOUNTS):
+            self._get("/portfolio/accounts")
+            time.sleep(0.5)
+        response = self._get(f"/portfolio/{account}/summary", read=_login_result, error=AUTH_ERROR)
+        if response.get("success"):
+            warmup_registry.mark_warm(PORTFOLIO_ACCOUNTS)
+        else:
+            warmup_registry.forget(PORTFOLIO_ACCOUNTS)
+        return response
+
+    def suppress_order_questions(self):
+        """
+        Suppress the precautionary order messages in IBKR_SUPPRESSED_ORDER_MESSAGES once per gateway session.
+        """
+        cache_key = session_cache_key("order_questions_suppressed")
+        if cache.get(cache_key):
+            return
+        response = self._post("/iserver/questions/suppress", json={"messageIds": settings.IBKR_SUPPRESSED_ORDER_MESSAGES})
+        if response.get("success"):
+            cache.set(cache_key, True, settings.IBKR_SESSION_CACHE_TTL)
+        else:
+            print(f"Unable to suppress IBKR order questions: {response.get('error') or response.get('status')}")
+
+    def confirm_order(self, order_response):
+        """
+        Confirm the reply messages of a submitted or modified order until the gateway accepts it.
+
+        Known questions are suppressed up front, so this only loops for unexpected ones.
+        Returns the list of accepted order entries (one per order in the request) and the error, if any.
+        """
+        if not order_response.get("success"):
+            return [], order_response.get("error")
+
+        data = order_response.get("data", [])
+        reply_id = self._pending_reply(data)
+        while reply_id:
+            confirm_response = self.replyOrder(reply_id, {"confirmed": True})
+            if not confirm_response.get("success"):
+                return [], confirm_response.get("error")
+            data = confirm_response.get("data")
+            reply_id = self._pending_reply(data)
+        return self._confirmed_orders(data)
+
+    def placeOrder(self, account, order_data):
+        self.suppress_order_questions()
+        return self._post(f"/iserver/account/{account}/orders", json=order_data)
+
+    def modifyOrder(self, order_id, account_id, json_content):
+        self.suppress_order_questions()
+        return self._post(f"/iserver/account/{account_id}/order/{order_id}", json=json_content,
+                          read=_json_result_with_error)
+
+    def retrieveOrders(self):
+        self.cached_brokerage_accounts()
+        return self._get("/iserver/account/order/status/1533705195")
 
     def last_day_price(self, contract_id):
-        try:
-            requests.get(url=f"{self.ibkr_base_url}/iserver/marketdata/snapshot?conids={contract_id}&fields=31,7295,70", verify=False)
+        subscription = snapshot_subscription(contract_id)
+        if not warmup_registry.is_warm(subscription):
+            self._get(_last_day_price_path(contract_id))
             # wait for one second to again hit the snapshot API
             time.sleep(1)
 
-            response = requests.get(f"{self.ibkr_base_url}/iserver/marketdata/snapshot?conids={contract_id}&fields=31,7295,70", verify=False)
-            if response.status_code == 200:
-                data = response.json()
-                if data:
-                    price = data[0].get('31')
-                    pre_market_price = data[0].get('7295')
-                    data_type = data[0].get('6509')
-                    if price:
-                        pattern = r'\d+(\.\d+)?'
-                        match = re.search(pattern, price)
-                        last_day_price = match.group(0) if match else None
-                        if last_day_price:
-                            return {"success": True, "last_day_price": float(last_day_price), "pre_market_price": pre_market_price, "data_type": data_type}
-                        else:
-                            return {"success": False, "error": "Error fetching the last price for the given contract id.", "status":500}
-                    else:
-                        return {"success": False, "error": "Error fetching the last price for the given contract id.",
-                                "status": 500}
-
-
-            else:
-                return {"success": False, "status": response.status_code}
-        except requests.exceptions.RequestException as e:
-            return {"success": False, "error": str(e), "status": 500}
+        snapshot = self._get(_last_day_price_path(contract_id))
+        if not snapshot.get("success"):
+            # Throttled, unreachable or failing gateway: nothing says the subscription lapsed
+            return snapshot
 
+        last_day_price = self._snapshot_price(snapshot.get("data"))
+        if last_day_price.get("success"):
+            warmup_registry.mark_warm(subscription, settings.IBKR_SNAPSHOT_SUBSCRIPTION_TTL)
+        else:
+            # The gateway answered without a price: the subscription lapsed, warm it up again on the next call
+            warmup_registry.forget(subscription)
+        return last_day_price
 
-    def strike_info(self, conid, strike, right, month):
-        url = f'{self.ibkr_base_url}/iserver/secdef/info?conid={conid}&secType=OPT&month={month}&strike={strike}&right={right}'
+    def market_snapshot(self, conids, fields):
+        """
+        Fetch a market data snapshot for one conid or a list of conids.
+
+        Lists are split into chunks of IBKR_SNAPSHOT_MAX_CONIDS so a whole option
+        chain costs a handful of requests instead of one per contract.
+        """
+        results = []
+        for chunk in _chunk_conids(conids):
+            results.append(self._get(f"/iserver/marketdata/snapshot?conids={chunk}&fields={fields}"))
+            if not results[-1].get("success"):
+                break
+        return self._merge_snapshots(results)
+
+
+def _chunk_conids(conids):
+    """
+    Yield comma separated conid lists no longer than the gateway snapshot limit.
+    """
+    if not isinstance(conids, (list, tuple, set)):
+        conids = [conids]
+    conids = [str(conid) for conid in conids]
+    size = settings.IBKR_SNAPSHOT_MAX_CONIDS
+    for index in range(0, len(conids), size):
+        yield ",".join(conids[index:index + size])
+
+
+def _parse_last_day_price(data):
+    """
+    Extract the last price from a /iserver/marketdata/snapshot response for fields 31,7295,70.
+    """
+    price = data[0].get('31')
+    pre_market_price = data[0].get('7295')
+    data_type = data[0].get('6509')
+    if price:
+        pattern = r'\d+(\.\d+)?'
+        match = re.search(pattern, price)
+        last_day_price = match.group(0) if match else None
+        if last_day_price:
+            return {"success": True, "last_day_price": float(last_day_price), "pre_market_price": pre_market_price, "data_type": data_type}
+    return {"success": False, "error": "Error fetching the last price for the given contract id.", "status": 500}
+
+
+class AsyncIBKRBase(_IBKRGateway):
+    """
+    Non-blocking twin of IBKRBase for the Channels consumers.
+
+    Exposes the same methods and response dictionaries as IBKRBase, but every call
+    is a coroutine running on the shared httpx connection pool so a slow gateway
+    response never stalls the event loop.
+    """
+    transport_errors = (httpx.HTTPError, ValueError)
+
+    async def _request(self, method, url, **kwargs):
+        key = _flight_key(method, url, kwargs)
+        if key is None:
+            return await self._send(method, url, **kwargs)
+        return await _async_flight.do((self.priority, key), lambda: self._send(method, url, **kwargs))
+
+    async def _send(self, method, url, **kwargs):
+        if not await pacer.aacquire(url, self.priority):
+            return httpx.Response(429, content=THROTTLED_RESPONSE, request=httpx.Request(method, url))
+
+        response = await get_async_http_client().request(method, url, **kwargs)
+        if response.status_code == 401:
+            await ainvalidate_auth_status()
+        return response
+
+    async def _call(self, method, path, read, error=None, json=None):
         try:
-            response = requests.get(url, verify=False)
-            if response.status_code == 200:
-                data = response.json()
-                if data:
-                    return {"success": True, "data": data}
-                else:
-                    return {"success": False, "status": "No data"}
-            else:
-                return {"success": False, "status": response.status_code}
-        except requests.exceptions.RequestException as e:
-            return {"success": False, "error": str(e), "status": 500}
+            return read(await self._request(method, f"{self.ibkr_base_url}{path}", json=json))
+        except self.transport_errors as e:
+            return self._transport_error(e, error)
+
+    async def auth_status(self):
+        auth_status = await self._post("/iserver/auth/status", read=_login_result, error=AUTH_ERROR)
+        if self._cacheable_auth_status(auth_status):
+            await aset_cached_auth_status(auth_status)
+        return auth_status
+
+    async def cached_auth_status(self):
+        auth_status = await aget_cached_auth_status()
+        if auth_status is None:
+            auth_status = await self.auth_status()
+        return auth_status
+
+    async def reauthenticate(self):
+        response = await self._post("/iserver/reauthenticate")
+        if response.get("success"):
+            await abump_session_epoch()
+        return response
+
+    async def cached_brokerage_accounts(self):
+        cache_key = await asession_cache_key("accounts")
+        accounts = await cache.aget(cache_key)
+        if accounts is not None:
+            return {"success": True, "data": accounts}
+
+        acc_response = await self.brokerage_accounts()
+        if acc_response.get("success"):
+            await cache.aset(cache_key, acc_response.get("data"), settings.IBKR_SESSION_CACHE_TTL)
+        return acc_response
+
+    async def account_summary(self):
+        account, error = self._first_account(await self.cached_brokerage_accounts())
+        if error:
+            return error
+
+        if not await warmup_registry.ais_warm(PORTFOLIO_ACCOUNTS):
+            await self._get("/portfolio/accounts")
+            await asyncio.sleep(0.5)
+        response = await self._get(f"/portfolio/{account}/summary", read=_login_result, error=AUTH_ERROR)
+        if response.get("success"):
+            await warmup_registry.amark_warm(PORTFOLIO_ACCOUNTS)
+        else:
+            await warmup_registry.aforget(PORTFOLIO_ACCOUNTS)
+        return response
+
+    async def suppress_order_questions(self):
+        cache_key = await asession_cache_key("order_questions_suppressed")
+        if await cache.aget(cache_key):
+            return
+        response = await self._post("/iserver/questions/suppress",
+                                    json={"messageIds": settings.IBKR_SUPPRESSED_ORDER_MESSAGES})
+        if response.get("success"):
+            await cache.aset(cache_key, True, settings.IBKR_SESSION_CACHE_TTL)
+        else:
+            print(f"Unable to suppress IBKR order questions: {response.get('error') or response.get('status')}")
+
+    async def confirm_order(self, order_response):
+        if not order_response.get("success"):
+            return [], order_response.get("error")
+
+        data = order_response.get("data", [])
+        reply_id = self._pending_reply(data)
+        while reply_id:
+            confirm_response = await self.replyOrder(reply_id, {"confirmed": True})
+            if not confirm_response.get("success"):
+                return [], confirm_response.get("error")
+            data = confirm_response.get("data")
+            reply_id = self._pending_reply(data)
+        return self._confirmed_orders(data)
+
+    async def placeOrder(self, account, order_data):
+        await self.suppress_order_questions()
+        return await self._post(f"/iserver/account/{account}/orders", json=order_data)
+
+    async def modifyOrder(self, order_id, account_id, json_content):
+        await self.suppress_order_questions()
+        return await self._post(f"/iserver/account/{account_id}/order/{order_id}", json=json_content,
+                                read=_json_result_with_error)
+
+    async def retrieveOrders(self):
+        await self.cached_brokerage_accounts()
+        return await self._get("/iserver/account/order/status/1533705195")
+
+    async def last_day_price(self, contract_id):
+        subscription = snapshot_subscription(contract_id)
+        if not await warmup_registry.ais_warm(subscription):
+            await self._get(_last_day_price_path(contract_id))
+            # wait for one second to again hit the snapshot API
+            await asyncio.sleep(1)
+
+        snapshot = await self._get(_last_day_price_path(contract_id))
+        if not snapshot.get("success"):
+            return snapshot
+
+        last_day_price = self._snapshot_price(snapshot.get("data"))
+        if last_day_price.get("success"):
+            await warmup_registry.amark_warm(subscription, settings.IBKR_SNAPSHOT_SUBSCRIPTION_TTL)
+        else:
+            await warmup_registry.aforget(subscription)
+        return last_day_price
+
+    async def market_snapshot(self, conids, fields):
+        results = await asyncio.gather(*[
+            self._get(f"/iserver/marketdata/snapshot?conids={chunk}&fields={fields}") for chunk in _chunk_conids(conids)
+        ])
+        return self._merge_snapshots(results)
@@ -0,0 +1,41 @@
+from django.conf import settings
+from django.core.cache import cache
+
+from .auth_state import session_cache_key, asession_cache_key
+
+PORTFOLIO_ACCOUNTS = "portfolio_accounts"
+
+
+def snapshot_subscription(conid):
+    return f"snapshot:{conid}"
+
+
+class WarmupRegistry:
+    """
+    Gateway resources that only answer after a pre-flight request, tracked per gateway session.
+
+    A market data snapshot returns its fields from the second request for a conid onwards,
+    and the /portfolio endpoints need /portfolio/accounts first. Once a resource answered
+    it is recorded here (shared by all workers) and later reads skip the pre-flight and its
+    sleep. Entries live for ``timeout`` seconds, the whole session by default.
+    """
+    def is_warm(self, name):
+        return bool(cache.get(session_cache_key(f"warm:{name}")))
+
+    def mark_warm(self, name, timeout=None):
+        cache.set(session_cache_key(f"warm:{name}"), True, timeout or settings.IBKR_SESSION_CACHE_TTL)
+
+    def forget(self, name):
+        cache.delete(session_cache_key(f"warm:{name}"))
+
+    async def ais_warm(self, name):
+        return bool(await cache.aget(await asession_cache_key(f"warm:{name}")))
+
+    async def amark_warm(self, name, timeout=None):
+        await cache.aset(await asession_cache_key(f"warm:{name}"), True, timeout or settings.IBKR_SESSION_CACHE_TTL)
+
+    async def aforget(self, name):
+        await cache.adelete(await asession_cache_key(f"warm:{name}"))
+
+
+warmup_registry = WarmupRegistry()
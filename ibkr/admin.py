@@ -1,9 +1,11 @@
 from django.contrib import admin
 
-from ibkr.models import OnBoardingProcess, SystemData, TimerData, Strikes, PlaceOrder
+from ibkr.models import OnBoardingProcess, SystemData, TimerData, Strikes, PlaceOrder, OptionContract, BarSeries
 
 admin.site.register(OnBoardingProcess)
 admin.site.register(SystemData)
 admin.site.register(TimerData)
 admin.site.register(Strikes)
-admin.site.register(PlaceOrder)
\ No newline at end of file
+admin.site.register(PlaceOrder)
+admin.site.register(OptionContract)
+admin.site.register(BarSeries)
@@ -0,0 +1,175 @@
+import math
+import re
+import time
+from datetime import timedelta
+
+from channels.db import database_sync_to_async
+from django.conf import settings
+from django.utils.timezone import now
+
+from ibkr.models import Bar, BarSeries
+
+_DURATION_UNITS = {
+    "min": timedelta(minutes=1),
+    "h": timedelta(hours=1),
+    "d": timedelta(days=1),
+    "w": timedelta(weeks=1),
+    "m": timedelta(days=30),
+    "y": timedelta(days=365),
+}
+
+
+def parse_duration(value):
+    """
+    Convert an IBKR period or bar size ("5min", "4h", "2w", ...) to a timedelta.
+    """
+    match = re.fullmatch(r"\s*(\d+)\s*(min|h|d|w|m|y)\s*,?", str(value))
+    if not match:
+        raise ValueError(f"Invalid IBKR duration: {value}")
+    return int(match.group(1)) * _DURATION_UNITS[match.group(2)]
+
+
+def tail_period(seconds):
+    """
+    Smallest IBKR history period covering the last ``seconds``, within the unit limits of the API.
+    """
+    minutes = math.ceil(seconds / 60)
+    if minutes <= 30:
+        return f"{max(minutes, 1)}min"
+    hours = math.ceil(seconds / 3600)
+    if hours <= 8:
+        return f"{hours}h"
+    return f"{math.ceil(seconds / 86400)}d"
+
+
+class BarStore:
+    """
+    Read-through store of /iserver/marketdata/history bars in the Bar table.
+
+    A read returns every stored bar of the requested period, counted back from the
+    newest stored bar the way the gateway counts back from the newest available data,
+    so a closed market still returns the last session. The gateway is only asked for
+    bars the store does not hold: the whole period the first time (or when a longer
+    period is requested), afterwards just the tail since the newest stored bar, and not
+    at all while the series was refreshed less than BAR_STORE_REFRESH_SECONDS ago.
+    Periods the store cannot interpret are passed to the gateway unchanged.
+    Responses keep the shape of IBKRBase.historical_data.
+    """
+    def history(self, ibkr, conid, bar, period=None, max_age=None):
+        period_ms = self._period_ms(period)
+        if period_ms is None:
+            return ibkr.historical_data(conid, bar, period)
+
+        fetch_period, full_period = self._plan(conid, bar, period, period_ms, max_age)
+        if fetch_period:
+            response = ibkr.historical_data(conid, bar, fetch_period)
+            if response.get("success"):
+                self._store(conid, bar, response.get("data") or {}, period_ms if full_period else None)
+            elif not self._has_series(conid, bar):
+                return response
+        return self._read(conid, bar, period_ms)
+
+    async def ahistory(self, ibkr, conid, bar, period=None, max_age=None):
+        """
+        Async variant of ``history`` for an AsyncIBKRBase client.
+        """
+        period_ms = self._period_ms(period)
+        if period_ms is None:
+            return await ibkr.historical_data(conid, bar, period)
+
+        fetch_period, full_period = await database_sync_to_async(self._plan)(conid, bar, period, period_ms, max_age)
+        if fetch_period:
+            response = await ibkr.historical_data(conid, bar, fetch_period)
+            if response.get("success"):
+                await database_sync_to_async(self._store)(
+                    conid, bar, response.get("data") or {}, period_ms if full_period else None
+                )
+            elif not await database_sync_to_async(self._has_series)(conid, bar):
+                return response
+        return await database_sync_to_async(self._read)(conid, bar, period_ms)
+
+    @staticmethod
+    def _period(period):
+        return period or "1w"
+
+    def _period_ms(self, period):
+        try:
+            return int(parse_duration(self._period(period)).total_seconds() * 1000)
+        except ValueError:
+            return None
+
+    @staticmethod
+    def _newest_bar(conid, bar):
+        return Bar.objects.filter(conid=conid, bar_size=bar).order_by("-timestamp").first()
+
+    def _plan(self, conid, bar, period, period_ms, max_age):
+        """
+        Return the period to fetch from the gateway, if any, and whether it is the whole requested period.
+        """
+        period = self._period(period)
+        series = BarSeries.objects.filter(conid=conid, bar_size=bar).first()
+        newest_bar = self._newest_bar(conid, bar)
+        if series is None or newest_bar is None or series.covered_from > newest_bar.timestamp - period_ms:
+            return period, True
+
+        if max_age is None:
+            max_age = settings.BAR_STORE_REFRESH_SECONDS
+        if (now() - series.fetched_at).total_seconds() < max_age:
+            return None, False
+
+        return tail_period(time.time() - newest_bar.timestamp / 1000), False
+
+    def _store(self, conid, bar, history, period_ms):
+        """
+        Upsert the bars of a history response. ``period_ms`` is the length of the period
+        fetched in full, which the series then covers back from its newest bar.
+        """
+        bars = [
+            Bar(conid=conid, bar_size=bar, timestamp=entry["t"], open=entry["o"], high=entry["h"],
+                low=entry["l"], close=entry["c"], volume=entry.get("v", 0))
+            for entry in history.get("data", [])
+        ]
+        Bar.objects.bulk_create(
+            bars,
+            update_conflicts=True,
+            unique_fields=["conid", "bar_size", "timestamp"],
+            update_fields=["open", "high", "low", "close", "volume"],
+        )
+
+        newest_bar = self._newest_bar(conid, bar)
+        end_ms = newest_bar.timestamp if newest_bar else int(time.time() * 1000)
+        covered_from = end_ms - period_ms if period_ms is not None else end_ms
+
+        history_info = {key: value for key, value in history.items() if key != "data"}
+        # get_or_create settles concurrent first fetches of the same series
+        series, created = BarSeries.objects.get_or_create(
+            conid=conid, bar_size=bar,
+            defaults={"covered_from": covered_from, "fetched_at": now(), "history_info": history_info},
+        )
+        if created:
+            return
+
+        if period_ms is not None:
+            series.covered_from = min(series.covered_from, covered_from)
+        series.fetched_at = now()
+        series.history_info = history_info
+        series.save()
+
+    @staticmethod
+    def _has_series(conid, bar):
+        return BarSeries.objects.filter(conid=conid, bar_size=bar).exists()
+
+    def _read(self, conid, bar, period_ms):
+        series = BarSeries.objects.filter(conid=conid, bar_size=bar).first()
+        newest_bar = self._newest_bar(conid, bar)
+        bars = []
+        if newest_bar:
+            bars = Bar.objects.filter(
+                conid=conid, bar_size=bar, timestamp__gt=newest_bar.timestamp - period_ms
+            ).order_by("timestamp")
+        data = dict(series.history_info or {}) if series else {}
+        data["data"] = [stored_bar.as_history_bar() for stored_bar in bars]
+        return {"success": True, "data": data}
+
+
+bar_store = BarStore()
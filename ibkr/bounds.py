@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+
+from ibkr.models import SystemData
+
+BASE_BAR = "5min"
+BASE_PERIOD = "2w"
+
+# pandas resample rule of every SystemData time frame
+RESAMPLE_RULES = {
+    "1d": "1D",
+    "4h": "4h",
+    "1h": "1h",
+    "30min": "30min",
+    "15min": "15min",
+    "5min": "5min",
+}
+
+
+def price_bounds(closing_prices, num_steps):
+    """
+    Expected price range one step ahead: the latest close +/- the std of the last ``num_steps`` step returns.
+    """
+    closing_prices = closing_prices.tail(num_steps)
+    std_dev_return = closing_prices.pct_change().dropna().std()
+
+    latest_price = closing_prices.iloc[-1]
+    range_upper = latest_price * (1 + std_dev_return)
+    range_lower = latest_price * (1 - std_dev_return)
+
+    return {
+        "upper_bound": None if np.isnan(range_upper) else round(float(range_upper), 2),
+        "lower_bound": None if np.isnan(range_lower) else round(float(range_lower), 2)
+    }
+
+
+def multi_timeframe_bounds(market_data, time_steps):
+    """
+    Bounds for every SystemData time frame and every window in ``time_steps`` from one base bar series.
+
+    The 5 minute base series is resampled into each time frame's closes (bins aligned to UTC),
+    so a single history request serves all of them.
+    """
+    df = pd.DataFrame(market_data.get('data', []))
+    if df.empty:
+        return {}
+    closes = pd.Series(df['c'].to_numpy(dtype=float), index=pd.to_datetime(df['t'], unit='ms')).sort_index()
+
+    bounds = {}
+    for time_frame, time_unit in SystemData.TIME_FRAME_CHOICES:
+        timeframe_closes = closes.resample(RESAMPLE_RULES[time_unit]).last().dropna()
+        if timeframe_closes.empty:
+            continue
+        bounds[time_frame] = {str(num_steps): price_bounds(timeframe_closes, num_steps) for num_steps in time_steps}
+    return bounds
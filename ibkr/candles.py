@@ -0,0 +1,76 @@
+from ibkr.utils import format_bar
+
+BAR_MS = 60 * 1000
+
+
+class CandleBuilder:
+    """
+    Rolling window of 1-minute candles of one contract, maintained incrementally.
+
+    The window is seeded once from /iserver/marketdata/history. Live prices then only
+    update the forming bar, or open a new one when a minute boundary is crossed (the
+    oldest bar drops out of the window). Every mutation returns the timestamps of the
+    bars it changed, so callers can push just those bars.
+    """
+    def __init__(self, history):
+        self.bars = [dict(bar) for bar in history.get("data", [])]
+        self.window = max(len(self.bars), 1)
+        self.meta = {key: value for key, value in history.items() if key != "data"}
+
+    def on_tick(self, price, timestamp_ms):
+        """
+        Apply a last price. Returns (changed bar timestamps, whether the previous bar just closed).
+        """
+        start = int(timestamp_ms - timestamp_ms % BAR_MS)
+        if self.bars and self.bars[-1]["t"] > start:
+            # Price older than the forming bar
+            return [], False
+
+        if self.bars and self.bars[-1]["t"] == start:
+            bar = self.bars[-1]
+            if bar["h"] >= price >= bar["l"] and bar["c"] == price:
+                return [], False
+            bar["h"] = max(bar["h"], price)
+            bar["l"] = min(bar["l"], price)
+            bar["c"] = price
+            return [start], False
+
+        closed = bool(self.bars)
+        self.bars.append({"t": start, "o": price, "h": price, "l": price, "c": price, "v": 0})
+        del self.bars[:-self.window]
+        return [start], closed
+
+    def merge(self, bars):
+        """
+        Overwrite bars of the window with authoritative history bars (e.g. a bar that just closed).
+        """
+        by_timestamp = {bar["t"]: bar for bar in self.bars}
+        changed = []
+        for history_bar in bars:
+            bar = by_timestamp.get(history_bar.get("t"))
+            if bar is None:
+                continue
+            values = {key: history_bar[key] for key in ("o", "h", "l", "c", "v") if key in history_bar}
+            if any(bar.get(key) != value for key, value in values.items()):
+                bar.update(values)
+                changed.append(bar["t"])
+        return changed
+
+    def frame(self, conid, timestamps=None):
+        """
+        Chart frame of the whole window, or only of the bars in ``timestamps`` (marked with "delta").
+        """
+        volume_factor = self.meta.get("volumeFactor", 1)
+        data = [
+            format_bar(bar, index, volume_factor) for index, bar in enumerate(self.bars)
+            if timestamps is None or bar["t"] in timestamps
+        ]
+        frame = {
+            **self.meta,
+            "data": data,
+            "conId": conid,
+            "at_Close": max((bar["c"] for bar in self.bars), default=0),
+        }
+        if timestamps is not None:
+            frame["delta"] = True
+        return frame
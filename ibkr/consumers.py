@@ -1,44 +1,52 @@
 import asyncio
 import json
+import time
 
-from channels.db import database_sync_to_async
 from django.utils.timezone import now
 from asgiref.sync import sync_to_async
 
 from core.base_consumer import BaseConsumer
+from core.price_feed import PriceFeed
+from .bar_store import bar_store
+from .candles import CandleBuilder
 from .models import TimerData, PlaceOrder
-from .utils import transform_ibkr_data
+from .pnl import PnLAggregator
+from .reconciliation import OrderReconciliationFeed, order_group_name
+from .timers import place_order_group_name
 
 
 class StrikesConsumer(BaseConsumer):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
-        self.send_place_order_task = None
+        self.place_order_group = None
         self.userObj = None
-        self.fetch_strikes = None
 
     async def connect(self):
         await super().connect()
+        if not self.keep_running:
+            return
 
-        self.send_place_order_task = asyncio.create_task(self.send_place_order_updates())
+        # Timer state changes are pushed by the timer view, update_timer and place_orders_task
+        self.place_order_group = place_order_group_name(self.userObj.id)
+        await self.channel_layer.group_add(self.place_order_group, self.channel_name)
 
-        # Start tasks for fetching last-day price and updating live data
-        self.update_last_price_task = asyncio.create_task(self.update_last_price_periodically())
-        self.update_live_data_task = asyncio.create_task(self.update_live_data())
+        timer_data = await self.fetch_timer_data()
+        await self.send_place_order(timer_data[0].place_order if timer_data else None)
 
     async def disconnect(self, code):
-        if self.send_place_order_task:
-            self.send_place_order_task.cancel()
-
-        if self.fetch_strikes:
-            self.fetch_strikes.cancel()
+        if self.place_order_group:
+            await self.channel_layer.group_discard(self.place_order_group, self.channel_name)
 
         await super().disconnect(code)
 
 
     async def receive(self, text_data):
         data = json.loads(text_data)
+        if data.get("action") == "resync":
+            await self.send_option_chain_snapshot()
+            return
+
         contract_id = data.get("contract_id")
         if not contract_id:
             await self.send(text_data=json.dumps({"error": "contract_id is a required parameter.", "authentication": True}))
@@ -46,22 +54,16 @@ class StrikesConsumer(BaseConsumer):
 
         self.month = await self.get_contract_month(contract_id)
         self.scope["contract_id"] = contract_id
-        self.fetch_strikes = asyncio.create_task(self.fetch_and_validate_strikes(contract_id))
-
-    async def send_place_order_updates(self):
-        while self.keep_running:
-            timer_data = await self.fetch_timer_data()
+        await self.subscribe_option_chain(contract_id, self.month, data.get("mode"))
 
-            place_order_value = None
-            if timer_data:
-                timer_data_obj = timer_data[0]
-                place_order_value = timer_data_obj.place_order
-            await self.send(text_data=json.dumps({
-                "place_order": place_order_value,
-                "authentication": True
-            }))
+    async def place_order_update(self, event):
+        await self.send_place_order(event["place_order"])
 
-            await asyncio.sleep(1)
+    async def send_place_order(self, place_order_value):
+        await self.send(text_data=json.dumps({
+            "place_order": place_order_value,
+            "authentication": True
+        }))
 
     @sync_to_async
     def fetch_timer_data(self):
@@ -73,106 +75,89 @@ class TradeManagementConsumer(BaseConsumer):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
-        self.placed_orders_status = None
+        self.orders_group = None
         self.orders = None
-        self.Pnl_tasks = []
+        self.pnl = PnLAggregator()
         self.orders_list = []
 
 
     async def connect(self):
         await super().connect()
+        if not self.keep_running:
+            return
 
         self.orders = await self.fetch_today_orders()
-        self.placed_orders_status = asyncio.create_task(self.orders_status())
-
-    async def disconnect(self, code):
-        if self.placed_orders_status:
-            self.placed_orders_status.cancel()
 
-        if self.Pnl_tasks:
-            for task in self.Pnl_tasks:
-                task.cancel()
+        # Status changes are pushed by the shared order reconciliation feed
+        self.orders_group = order_group_name(self.userObj.id)
+        await self.channel_layer.group_add(self.orders_group, self.channel_name)
+        await self.subscribe_feed(OrderReconciliationFeed(), prime=False)
 
-        await super().disconnect(code)
+        for order in self.orders:
+            self.orders_list.append({str(order.id): self.initial_order_status(order)})
+        await self.send(text_data=json.dumps(self.orders_list))
+        for order in self.orders:
+            await self.start_pnl(order)
 
-    async def orders_status(self):
-        try:
-            while self.keep_running:
-                if not self.orders:
-                    await asyncio.sleep(0.1)
-                    continue
-
-                for order in self.orders:
-                    if order.order_status == "Filled" and not any(task.get_name() == str(order.id) for task in self.Pnl_tasks):
-                        task = asyncio.create_task(self.calculate_pnl(order))
-                        task.set_name(str(order.id))
-                        self.Pnl_tasks.append(task)
-                    order_id = None
-                    order_status = ""
-
-                    order_payload = order.order_api_response
-                    if not order_payload:
-                        order_status = "Cancelled"
-                    elif order_payload.get('error'):
-                        order_status = "Cancelled"
-                    elif order_payload.get('cqe', {}).get('rejections', ''):
-                        order_status = "Cancelled"
-                    else:
-                        order_id = order_payload.get('order_id')
-                    if order_id:
-                        response = self.ibkr.orderStatus(order_id)
-                        if not response.get('success'):
-                            order_status = ""
-                        else:
-                            order_status = response.get('data').get('order_status')
-                            average_price = response.get('data').get('average_price')
-                            order.order_status = order_status
-                            order.average_price = average_price if average_price else 0.0
-                            await database_sync_to_async(order.save)()
-
-                    found = False
-                    for order_item in self.orders_list:
-                        if str(order.id) in order_item:
-                            order_item[str(order.id)] = order_status
-                            found = True
-                            break
-
-                    if not found:
-                        self.orders_list.append({str(order.id): order_status})
-
-
-
-                    # Send the updated data immediately
-                    await self.send(text_data=json.dumps(self.orders_list))
-                    await asyncio.sleep(0)
-
-                await asyncio.sleep(2)
-        except Exception as e:
-            print(e.args)
-
-    async def calculate_pnl(self, order):
-        while self.keep_running:
-            entry_price = await self.fetch_last_day_price(order.conid)
-            sold_price = order.average_price
-            quantity = order.quantity
-
-            if entry_price is None or sold_price is None:
-                return
+    async def disconnect(self, code):
+        if self.orders_group:
+            await self.channel_layer.group_discard(self.orders_group, self.channel_name)
 
-            # Calculate Realized P&L (Profit or Loss)
-            pnl = (sold_price - entry_price) * quantity
+        await super().disconnect(code)
 
-            pnl_data = {
-                'contract': order.con_desc2,
-                'volume': order.quantity,
-                'sold_price': sold_price,
-                'current_price': entry_price,
-                'pnl': pnl,
-                'order_id': order.id,
-            }
+    @staticmethod
+    def initial_order_status(order):
+        order_payload = order.order_api_response
+        if not order_payload:
+            return "Cancelled"
+        elif order_payload.get('error'):
+            return "Cancelled"
+        elif order_payload.get('cqe', {}).get('rejections', ''):
+            return "Cancelled"
+        return order.order_status or ""
+
+    async def start_pnl(self, order):
+        """
+        Track the P&L of a filled order against the shared price feed of its contract.
+        """
+        if order.order_status != "Filled" or not self.pnl.add(order):
+            return
 
+        price_feed = PriceFeed(order.conid)
+        if price_feed.group_name not in self.feed_groups:
+            await self.subscribe_feed(price_feed, prime=False)
+            latest = await price_feed.latest()
+            if latest:
+                await self.price_tick({"payload": latest})
+
+    async def order_status(self, event):
+        """
+        Apply the status changes reconciled from the gateway and send the updated statuses.
+        """
+        orders = event["orders"]
+        for order in self.orders:
+            update = orders.get(str(order.id))
+            if not update:
+                continue
+            order.order_status = update["order_status"]
+            order.average_price = update["average_price"]
+
+            for order_item in self.orders_list:
+                if str(order.id) in order_item:
+                    order_item[str(order.id)] = order.order_status
+
+        await self.send(text_data=json.dumps(self.orders_list))
+        for order in self.orders:
+            await self.start_pnl(order)
+
+    async def price_tick(self, event):
+        """
+        Recompute the P&L of every tracked position with the new contract price.
+        """
+        payload = event["payload"]
+        self.pnl.update_price(payload["conid"], payload["price"])
+        for pnl_data in self.pnl.positions():
             await self.send(text_data=json.dumps(pnl_data))
-            await asyncio.sleep(1.5)
 
     @sync_to_async
     def fetch_today_orders(self):
@@ -187,7 +172,10 @@ class ChartsData(BaseConsumer):
         self.contract_id = None
         self.month = None
         self.candle_graph_task = None
-        self.prices_task = None
+        self.refresh_task = None
+        self.price_feed = None
+        self.candles = None
+        self.chart_mode = "full"
         self.close_price = None
         self.pre_market_price = None
         super().__init__(*args, **kwargs)
@@ -199,8 +187,8 @@ class ChartsData(BaseConsumer):
     async def disconnect(self, code):
         if self.candle_graph_task:
             self.candle_graph_task.cancel()
-        if self.prices_task:
-            self.prices_task.cancel()
+        if self.refresh_task:
+            self.refresh_task.cancel()
 
         await super().disconnect(code)
 
@@ -208,7 +196,7 @@ class ChartsData(BaseConsumer):
         try:
             data = json.loads(text_data)
             ticker = data.get("ticker")
-            authentication = self.ibkr.auth_status()
+            authentication = await self.ibkr.cached_auth_status()
             if not authentication.get("success"):
                 await self.send(text_data=json.dumps({"authentication": False, "error": "You are not authenticated with IBKR. Please login first."}))
                 await self.close()
@@ -223,73 +211,87 @@ class ChartsData(BaseConsumer):
                 await self.send(text_data=json.dumps({"error": f"Unable to select contract for the selected ticker {ticker}"}))
                 await self.close()
                 return
-            self.candle_graph_task = asyncio.create_task(self.candle_data())
-            self.prices_task = asyncio.create_task(self.updated_prices())
+            await self.follow_contract(self.contract_id, data.get("mode"))
         except Exception as e:
             print(e.args)
 
+    async def follow_contract(self, contract_id, mode=None):
+        """
+        Seed the candles of ``contract_id`` once and keep them up to date from its shared price feed.
 
-    async def updated_prices(self):
-        while self.keep_running:
-            if not self.contract_id:
-                await asyncio.sleep(0.2)
-                continue
-            live_data_response = self.ibkr.last_day_price(self.contract_id)
-            if live_data_response.get('success'):
-                self.pre_market_price = live_data_response.get('last_day_price')
-                await self.send(text_data=json.dumps({'pre_market_price': self.pre_market_price}))
-                await asyncio.sleep(1)
+        In "full" mode (default) every change re-sends the whole candle window; in "delta" mode
+        only the new or changed bars are sent, marked with "delta": true.
+        """
+        self.chart_mode = mode if mode in ("full", "delta") else "full"
+        if self.candle_graph_task:
+            self.candle_graph_task.cancel()
+        if self.price_feed:
+            await self.unsubscribe_feed(self.price_feed.group_name)
+        self.candles = None
+
+        self.candle_graph_task = asyncio.create_task(self.candle_data())
+        self.price_feed = PriceFeed(contract_id)
+        await self.subscribe_feed(self.price_feed, prime=False)
+        latest = await self.price_feed.latest()
+        if latest:
+            await self.price_tick({"payload": latest})
 
 
     async def candle_data(self):
         while self.keep_running:
-            if not self.contract_id:
-                await asyncio.sleep(0.1)
-                continue
-            history_data = self.ibkr.historical_data(self.contract_id, '1min', '5min')
+            history_data = await bar_store.ahistory(self.ibkr, self.contract_id, '1min', '5min')
 
-            if history_data.get('success'):
-                try:
-                    formatted_data = transform_ibkr_data(history_data.get('data'), self.contract_id)
-                except Exception as e:
-                    print(e.args)
-                await self.send(text_data=json.dumps(formatted_data))
-                await asyncio.sleep(0)
-            else:
-                await self.send(text_data=json.dumps({"conId": self.contract_id}))
-                await asyncio.sleep(0)
+            if history_data.get('success') and history_data.get('data', {}).get('data'):
+                self.candles = CandleBuilder(history_data.get('data'))
+                await self.send(text_data=json.dumps(self.candles.frame(self.contract_id)))
+                return
 
+            await self.send(text_data=json.dumps({"conId": self.contract_id}))
+            await asyncio.sleep(5)
 
+    async def price_tick(self, event):
+        payload = event["payload"]
+        if str(payload["conid"]) != str(self.contract_id):
+            return
 
-            await asyncio.sleep(5)
+        self.pre_market_price = payload["price"]
+        await self.send(text_data=json.dumps({'pre_market_price': self.pre_market_price}))
+
+        if self.candles:
+            changed, closed = self.candles.on_tick(self.pre_market_price, time.time() * 1000)
+            await self.send_candles(changed)
+            if closed and (self.refresh_task is None or self.refresh_task.done()):
+                self.refresh_task = asyncio.create_task(self.refresh_closed_bars())
+
+    async def refresh_closed_bars(self):
+        """
+        Replace the bar that just closed with the gateway's own bar, which carries its real volume.
+        """
+        history_data = await bar_store.ahistory(self.ibkr, self.contract_id, '1min', '2min', max_age=0)
+        if history_data.get('success') and self.candles:
+            await self.send_candles(self.candles.merge(history_data.get('data', {}).get('data', [])))
+
+    async def send_candles(self, changed):
+        if not changed:
+            return
+        timestamps = None if self.chart_mode == "full" else set(changed)
+        await self.send(text_data=json.dumps(self.candles.frame(self.contract_id, timestamps)))
 
 
 class StreamOptionData(BaseConsumer):
     def __init__(self, *args, **kwargs):
         self.contract_id = None
-        self.fetch_strikes_task = None
-        self.live_data_task = None
-        self.all_strikes = {}
         super().__init__(*args, **kwargs)
 
-    async def connect(self):
-        await super().connect()
-
-        # Start tasks for fetching last-day price and updating live data
-        self.update_last_price_task = asyncio.create_task(self.update_last_price_periodically())
-        self.update_live_data_task = asyncio.create_task(self.update_live_data())
-
-    async def disconnect(self, code):
-        if self.fetch_strikes_task:
-            self.fetch_strikes_task.cancel()
-
-        await super().disconnect(code)
-
     async def receive(self, text_data):
         # Parse received JSON data
         data = json.loads(text_data)
+        if data.get("action") == "resync":
+            await self.send_option_chain_snapshot()
+            return
+
         ticker = data.get("ticker")
-        authentication = self.ibkr.auth_status()
+        authentication = await self.ibkr.cached_auth_status()
         if not authentication.get("success"):
             await self.send(text_data=json.dumps({"authentication": False, "error": "You are not authenticated with IBKR. Please login first."}))
             await self.close()
@@ -305,5 +307,4 @@ class StreamOptionData(BaseConsumer):
             await self.close()
             return
         self.scope["contract_id"] = self.contract_id
-
-        self.fetch_strikes_task = asyncio.create_task(self.fetch_and_validate_strikes(self.contract_id))
+        await self.subscribe_option_chain(self.contract_id, self.month, data.get("mode"))
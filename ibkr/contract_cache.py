@@ -0,0 +1,111 @@
+import threading
+from datetime import datetime
+
+from channels.db import database_sync_to_async
+
+from ibkr.models import OptionContract
+
+# Marks a key the gateway has no contract for, so it is not looked up again
+_NO_CONTRACT = object()
+
+
+class ContractResolver:
+    """
+    Read-through cache resolving (underlying conid, month, strike, right, expiry) to an option contract.
+
+    Lookups hit process memory first, then the OptionContract table, and only then
+    /iserver/secdef/info. Every expiry returned by the gateway is persisted, so each
+    contract is resolved against the gateway at most once per trading day.
+    """
+    def __init__(self):
+        self._contracts = {}
+        self._lock = threading.Lock()
+
+    def resolve(self, ibkr, underlying_conid, strike, right, month, maturity_date=None):
+        """
+        Return the ``/iserver/secdef/info`` entry of the contract, or None if it does not exist.
+        """
+        key = self._key(underlying_conid, strike, right, month, maturity_date)
+        contract = self._from_memory(key)
+        if contract is None:
+            contract = self._from_db(key)
+        if contract is None:
+            strike_info = ibkr.strike_info(underlying_conid, strike, right, month)
+            if not strike_info.get("success"):
+                return None
+            contract = self._store(key, strike_info.get("data"))
+        return None if contract is _NO_CONTRACT else contract
+
+    async def aresolve(self, ibkr, underlying_conid, strike, right, month, maturity_date=None):
+        """
+        Async variant of ``resolve`` for an AsyncIBKRBase client.
+        """
+        key = self._key(underlying_conid, strike, right, month, maturity_date)
+        contract = self._from_memory(key)
+        if contract is None:
+            contract = await database_sync_to_async(self._from_db)(key)
+        if contract is None:
+            strike_info = await ibkr.strike_info(underlying_conid, strike, right, month)
+            if not strike_info.get("success"):
+                return None
+            contract = await database_sync_to_async(self._store)(key, strike_info.get("data"))
+        return None if contract is _NO_CONTRACT else contract
+
+    @staticmethod
+    def _key(underlying_conid, strike, right, month, maturity_date):
+        if not maturity_date:
+            maturity_date = datetime.now().strftime("%Y%m%d")
+        return str(underlying_conid), str(month), float(strike), right, str(maturity_date)
+
+    def _from_memory(self, key):
+        return self._contracts.get(key)
+
+    def _remember(self, key, contract):
+        with self._lock:
+            # Contracts of past expiries are never looked up again
+            today = datetime.now().strftime("%Y%m%d")
+            for stale_key in [k for k in self._contracts if k[4] < today]:
+                del self._contracts[stale_key]
+            self._contracts[key] = contract
+
+    def _from_db(self, key):
+        underlying_conid, month, strike, right, maturity_date = key
+        option_contract = OptionContract.objects.filter(
+            underlying_conid=underlying_conid, month=month, strike=strike, right=right, maturity_date=maturity_date
+        ).first()
+        if not option_contract:
+            return None
+
+        contract = option_contract.contract_info if option_contract.conid else _NO_CONTRACT
+        self._remember(key, contract)
+        return contract
+
+    def _store(self, key, contracts):
+        underlying_conid, month, strike, right, maturity_date = key
+        rows = {}
+        for obj in contracts or []:
+            obj_maturity_date = obj.get("maturityDate")
+            if not obj_maturity_date or not obj.get("conid"):
+                continue
+            rows[str(obj_maturity_date)] = OptionContract(
+                underlying_conid=underlying_conid,
+                month=month,
+                strike=strike,
+                right=right,
+                maturity_date=str(obj_maturity_date),
+                conid=obj.get("conid"),
+                contract_info=obj,
+            )
+        if maturity_date not in rows:
+            rows[maturity_date] = OptionContract(
+                underlying_conid=underlying_conid, month=month, strike=strike, right=right, maturity_date=maturity_date
+            )
+        OptionContract.objects.bulk_create(rows.values(), ignore_conflicts=True)
+
+        for row in rows.values():
+            row_key = (underlying_conid, month, strike, right, row.maturity_date)
+            self._remember(row_key, row.contract_info if row.conid else _NO_CONTRACT)
+        return self._from_memory(key)
+
+
+contract_resolver = ContractResolver()
@@ -0,0 +1,77 @@
+import logging
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils.timezone import now
+
+from core.auth_state import get_session_state, set_session_state, get_session_epoch, bump_session_epoch
+from core.views import IBKRBase
+from ibkr.models import OnBoardingProcess
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Keep the IBKR gateway session alive and publish its state to the rest of the app."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Run a single pass and exit.")
+
+    def handle(self, *args, **options):
+        self.ibkr = IBKRBase()
+        self.session_state = None
+        self.last_tickle = 0
+
+        while True:
+            # This is the only process keeping the session alive, so a failed pass must not end it
+            try:
+                self.run_pass()
+            except Exception as e:
+                logger.exception("IBKR session keeper pass failed")
+                self.stderr.write(f"IBKR session keeper pass failed: {e}")
+
+            if options["once"]:
+                break
+            time.sleep(settings.IBKR_SESSION_KEEPER_INTERVAL)
+
+    def run_pass(self):
+        if self.session_state is None:
+            self.session_state = get_session_state()
+
+        # auth_status() also refreshes the auth state cache read by views and consumers
+        response = self.ibkr.auth_status()
+        connected = response.get("success", False)
+        authenticated = connected and bool(response.get("data", {}).get("authenticated"))
+
+        if authenticated and time.monotonic() - self.last_tickle >= settings.IBKR_TICKLE_INTERVAL:
+            tickle = self.ibkr.tickle()
+            if tickle.get("success"):
+                self.last_tickle = time.monotonic()
+            else:
+                self.stderr.write(f"IBKR tickle failed with status {tickle.get('status')}")
+
+        self.session_state = self.publish(self.session_state, connected, authenticated)
+
+    def publish(self, session_state, connected, authenticated):
+        """
+        Store the session state and, when the gateway session is lost, mark every onboarded user unauthenticated.
+        """
+        epoch = get_session_epoch()
+        if authenticated and not session_state.get("authenticated"):
+            epoch = bump_session_epoch()
+            self.stdout.write(f"IBKR gateway session authenticated (epoch {epoch}).")
+        elif not authenticated and session_state.get("authenticated"):
+            self.stdout.write("IBKR gateway session lost.")
+
+        if not authenticated:
+            OnBoardingProcess.objects.filter(authenticated=True).update(authenticated=False, updated_at=now())
+
+        session_state = {
+            "authenticated": authenticated,
+            "connected": connected,
+            "epoch": epoch,
+            "checked_at": now().isoformat(),
+        }
+        set_session_state(session_state)
+        return session_state
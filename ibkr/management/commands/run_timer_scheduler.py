@@ -0,0 +1,58 @@
+import logging
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils.timezone import now
+
+from ibkr.models import TimerData
+from ibkr.tasks import update_timer
+from ibkr.timers import schedule_timer, pop_due_timers, next_deadline, reschedule_timers
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Fire update_timer once for every TimerData deadline as it expires."
+
+    def handle(self, *args, **options):
+        registered = False
+        while True:
+            wait = settings.IBKR_TIMER_SCHEDULER_MAX_SLEEP
+            # A failed pass (Redis or broker down) is retried, the scheduler itself never stops
+            try:
+                if not registered:
+                    self.register_pending_timers()
+                    registered = True
+                wait = self.run_pass()
+            except Exception as e:
+                logger.exception("Timer scheduler pass failed")
+                self.stderr.write(f"Timer scheduler pass failed: {e}")
+            time.sleep(wait)
+
+    def register_pending_timers(self):
+        """
+        Re-register pending timers in case the Redis schedule was lost.
+        """
+        for timer in TimerData.objects.filter(deadline__isnull=False, created_at__date=now().date()).exclude(place_order__in=["N", "D"]):
+            schedule_timer(timer)
+
+    def run_pass(self):
+        """
+        Enqueue every due timer and return the seconds to sleep until the next pass.
+        """
+        due_timer_ids = pop_due_timers(time.time())
+        for index, timer_id in enumerate(due_timer_ids):
+            try:
+                update_timer.delay(timer_id)
+            except Exception:
+                # Put the timers that were not enqueued back, so the next pass fires them
+                reschedule_timers(due_timer_ids[index:], time.time())
+                raise
+
+        # Wake up for the earliest deadline, but re-check regularly for newly created timers
+        wait = settings.IBKR_TIMER_SCHEDULER_MAX_SLEEP
+        deadline = next_deadline()
+        if deadline is not None:
+            wait = min(wait, max(0, deadline - time.time()))
+        return wait
@@ -0,0 +1,32 @@
+# Generated by Django 5.1.15 on 2026-10-17 03:01
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ibkr', '0036_alter_placeorder_system_data'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OptionContract',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True, null=True)),
+                ('underlying_conid', models.CharField(max_length=255)),
+                ('month', models.CharField(max_length=15)),
+                ('strike', models.FloatField()),
+                ('right', models.CharField(max_length=1)),
+                ('maturity_date', models.CharField(max_length=8)),
+                ('conid', models.IntegerField(blank=True, null=True)),
+                ('contract_info', models.JSONField(blank=True, null=True)),
+            ],
+            options={
+                'unique_together': {('underlying_conid', 'month', 'strike', 'right', 'maturity_date')},
+            },
+        ),
+    ]
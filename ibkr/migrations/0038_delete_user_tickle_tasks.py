@@ -0,0 +1,21 @@
+from django.db import migrations
+
+
+def delete_user_tickle_tasks(apps, schema_editor):
+    """
+    The gateway session is kept alive by the run_session_keeper command, per-user tickle tasks are obsolete.
+    """
+    PeriodicTask = apps.get_model("django_celery_beat", "PeriodicTask")
+    PeriodicTask.objects.filter(name__startswith="tickle_ibkr_session_user_").delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ibkr', '0037_optioncontract'),
+        ('django_celery_beat', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(delete_user_tickle_tasks, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.1.15 on 2026-10-17 03:07
+
+from datetime import timedelta
+
+from django.db import migrations, models
+
+
+def backfill_deadlines(apps, schema_editor):
+    """
+    Give existing timers an absolute deadline and drop their per-minute update_timer tasks.
+    """
+    TimerData = apps.get_model("ibkr", "TimerData")
+    PeriodicTask = apps.get_model("django_celery_beat", "PeriodicTask")
+
+    timers = list(TimerData.objects.filter(deadline__isnull=True, created_at__isnull=False))
+    for timer in timers:
+        timer.deadline = timer.created_at + timedelta(minutes=max(0, timer.original_timer_value))
+    TimerData.objects.bulk_update(timers, ["deadline"])
+
+    PeriodicTask.objects.filter(task="ibkr.tasks.update_timer").delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ibkr', '0038_delete_user_tickle_tasks'),
+        ('django_celery_beat', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='timerdata',
+            name='deadline',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(backfill_deadlines, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.1.15 on 2026-10-17 03:15
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ibkr', '0039_timerdata_deadline'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Bar',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('conid', models.IntegerField()),
+                ('bar_size', models.CharField(max_length=10)),
+                ('timestamp', models.BigIntegerField()),
+                ('open', models.FloatField()),
+                ('high', models.FloatField()),
+                ('low', models.FloatField()),
+                ('close', models.FloatField()),
+                ('volume', models.FloatField()),
+            ],
+            options={
+                'unique_together': {('conid', 'bar_size', 'timestamp')},
+            },
+        ),
+        migrations.CreateModel(
+            name='BarSeries',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True, null=True)),
+                ('conid', models.IntegerField()),
+                ('bar_size', models.CharField(max_length=10)),
+                ('covered_from', models.BigIntegerField()),
+                ('fetched_at', models.DateTimeField()),
+                ('history_info', models.JSONField(blank=True, null=True)),
+            ],
+            options={
+                'unique_together': {('conid', 'bar_size')},
+            },
+        ),
+    ]
@@ -1,3 +1,6 @@
+import math
+from datetime import datetime, timedelta
+
 import requests
 from django.conf import settings
 from django.core.exceptions import ValidationError
@@ -93,11 +96,39 @@ class TimerData(BaseModel):
     start_time = models.TimeField()
     place_order = models.CharField(max_length=5, blank=True, null=True)
     system_data = models.ForeignKey(SystemData, on_delete=models.CASCADE, blank=True, null=True)
+    deadline = models.DateTimeField(blank=True, null=True)
 
 
     def __str__(self):
         return f"{self.timer_value}-{self.user.email}-{self.created_at}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if "deadline" in instance.__dict__:
+            instance.sync_countdown()
+        return instance
+
+    def sync_countdown(self):
+        """
+        Derive timer_value, start_time and place_order from the deadline.
+
+        The countdown is not written every minute; the remaining whole minutes are computed
+        whenever the row is read and only the final "D" (orders placed) state is kept as stored.
+        The deadline is original_timer_value minutes after the timer was started.
+        """
+        if not self.deadline:
+            return
+
+        remaining = max(0, math.ceil((self.deadline - now()).total_seconds() / 60))
+        if self.original_time_start and self.original_timer_value:
+            elapsed = max(0, self.original_timer_value - remaining)
+            start_datetime = datetime.combine(now().date(), self.original_time_start)
+            self.start_time = (start_datetime + timedelta(minutes=elapsed)).time()
+        self.timer_value = remaining
+        if self.place_order != "D":
+            self.place_order = "P" if remaining else "N"
+
 
 class PlaceOrder(BaseModel):
     ORDER_TYPE_CHOICES =[
@@ -151,3 +182,67 @@ class Strikes(BaseModel):
     is_valid = models.BooleanField(blank=True, null=True)
     month = models.CharField(max_length=15, blank=True, null=True)
     right = models.CharField(max_length=10) # tells if the strike is for Put or Call
+
+
+class OptionContract(BaseModel):
+    """
+    Resolved option contract for an underlying, month, strike, right and expiry.
+
+    A row with an empty conid records that the gateway has no contract for that expiry.
+    """
+    underlying_conid = models.CharField(max_length=255)
+    month = models.CharField(max_length=15)
+    strike = models.FloatField()
+    right = models.CharField(max_length=1)
+    maturity_date = models.CharField(max_length=8)
+    conid = models.IntegerField(blank=True, null=True)
+    contract_info = models.JSONField(blank=True, null=True)
+
+    class Meta:
+        unique_together = ('underlying_conid', 'month', 'strike', 'right', 'maturity_date')
+
+    def __str__(self):
+        return f"{self.underlying_conid} - {self.month} - {self.strike}{self.right} - {self.maturity_date}"
+
+
+class BarSeries(BaseModel):
+    """
+    Locally stored /iserver/marketdata/history series of one contract and bar size.
+
+    ``covered_from`` is the oldest bar timestamp (ms) the store holds every bar from,
+    ``history_info`` the response fields other than the bars themselves.
+    """
+    conid = models.IntegerField()
+    bar_size = models.CharField(max_length=10)
+    covered_from = models.BigIntegerField()
+    fetched_at = models.DateTimeField()
+    history_info = models.JSONField(blank=True, null=True)
+
+    class Meta:
+        unique_together = ('conid', 'bar_size')
+
+    def __str__(self):
+        return f"{self.conid} - {self.bar_size}"
+
+
+class Bar(models.Model):
+    """
+    One OHLCV bar of a BarSeries, kept compact with an integer key and the gateway's ms timestamp.
+    """
+    conid = models.IntegerField()
+    bar_size = models.CharField(max_length=10)
+    timestamp = models.BigIntegerField()
+    open = models.FloatField()
+    high = models.FloatField()
+    low = models.FloatField()
+    close = models.FloatField()
+    volume = models.FloatField()
+
+    class Meta:
+        unique_together = ('conid', 'bar_size', 'timestamp')
+
+    def __str__(self):
+        return f"{self.conid} - {self.bar_size} - {self.timestamp}"
+
+    def as_history_bar(self):
+        return {"t": self.timestamp, "o": self.open, "h": self.high, "l": self.low, "c": self.close, "v": self.volume}
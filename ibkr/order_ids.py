@@ -0,0 +1,62 @@
+import os
+import threading
+
+from django.conf import settings
+from django.db.models import Max, IntegerField
+from django.db.models.functions import Cast, Substr
+
+from core.redis_client import get_redis
+from ibkr.models import PlaceOrder
+
+ORDER_ID_COUNTER_KEY = "ibkr:customer_order_id"
+
+
+class CustomerOrderIdAllocator:
+    """
+    Hands out unique customer order ids ("order-id-<n>") without scanning PlaceOrder.
+
+    ``n`` comes from a Redis counter shared by every worker. Each process reserves
+    IBKR_ORDER_ID_BLOCK_SIZE numbers with one INCRBY and serves ids from that block in
+    memory, so allocation is constant time and two workers can never get the same id.
+    The counter is seeded once from the highest id saved in the database, plus
+    IBKR_ORDER_ID_SEED_GAP to skip numbers that may still be reserved in a worker's
+    block if Redis lost the counter.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._next = 1
+        self._end = 0
+        self._pid = None
+
+    def allocate(self, count=1):
+        with self._lock:
+            if self._pid != os.getpid():
+                # A forked worker must not reuse the block reserved by its parent
+                self._next, self._end = 1, 0
+                self._pid = os.getpid()
+
+            order_ids = []
+            while len(order_ids) < count:
+                if self._next > self._end:
+                    self._reserve_block()
+                order_ids.append(f"order-id-{self._next}")
+                self._next += 1
+            return order_ids
+
+    def _reserve_block(self):
+        block_size = settings.IBKR_ORDER_ID_BLOCK_SIZE
+        redis = get_redis()
+        if not redis.exists(ORDER_ID_COUNTER_KEY):
+            redis.set(ORDER_ID_COUNTER_KEY, self._last_saved_id() + settings.IBKR_ORDER_ID_SEED_GAP, nx=True)
+
+        self._end = redis.incrby(ORDER_ID_COUNTER_KEY, block_size)
+        self._next = self._end - block_size + 1
+
+    @staticmethod
+    def _last_saved_id():
+        return PlaceOrder.objects.annotate(
+            numeric_id=Cast(Substr('customer_order_id', 10), IntegerField())
+        ).aggregate(max_id=Max('numeric_id'))['max_id'] or 0
+
+
+order_id_allocator = CustomerOrderIdAllocator()
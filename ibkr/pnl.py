@@ -0,0 +1,46 @@
+import numpy as np
+
+
+class PnLAggregator:
+    """
+    P&L of all filled orders of one socket, recomputed together whenever a contract price ticks.
+    """
+    def __init__(self):
+        self.orders = []
+        self.prices = {}
+
+    def add(self, order):
+        """
+        Track a filled order. Returns False if it was already tracked.
+        """
+        if any(tracked.id == order.id for tracked in self.orders):
+            return False
+        self.orders.append(order)
+        return True
+
+    def update_price(self, conid, price):
+        self.prices[int(conid)] = price
+
+    def positions(self):
+        orders = [
+            order for order in self.orders
+            if order.average_price is not None and self.prices.get(int(order.conid)) is not None
+        ]
+        if not orders:
+            return []
+
+        sold_prices = np.array([order.average_price for order in orders], dtype=float)
+        current_prices = np.array([self.prices[int(order.conid)] for order in orders], dtype=float)
+        quantities = np.array([order.quantity for order in orders], dtype=float)
+
+        # Realized P&L (Profit or Loss) of the short positions
+        pnls = (sold_prices - current_prices) * quantities
+
+        return [{
+            'contract': order.con_desc2,
+            'volume': order.quantity,
+            'sold_price': order.average_price,
+            'current_price': float(current_price),
+            'pnl': float(pnl),
+            'order_id': str(order.id),
+        } for order, current_price, pnl in zip(orders, current_prices, pnls)]
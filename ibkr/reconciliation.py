@@ -0,0 +1,70 @@
+import asyncio
+
+from channels.db import database_sync_to_async
+from django.conf import settings
+from django.utils.timezone import now
+
+from core.feeds import Feed
+from ibkr.models import PlaceOrder
+
+
+def order_group_name(user_id):
+    return f"orders_{user_id}"
+
+
+def reconcile_orders(live_orders):
+    """
+    Diff the gateway's live orders against today's PlaceOrder rows and save the changed ones with one bulk_update.
+
+    Returns the changes grouped by user: {user_id: {place_order_id: {"order_status", "average_price"}}}.
+    """
+    live_orders = {str(order.get("orderId")): order for order in live_orders if order.get("orderId")}
+    if not live_orders:
+        return {}
+
+    changed = []
+    for order in PlaceOrder.objects.filter(created_at__date=now().date(), order_api_response__isnull=False):
+        order_payload = order.order_api_response
+        live_order = live_orders.get(str(order_payload.get("order_id"))) if isinstance(order_payload, dict) else None
+        if not live_order:
+            continue
+
+        order_status = live_order.get("status")
+        average_price = float(live_order.get("avgPrice") or 0.0)
+        if order_status == order.order_status and average_price == order.average_price:
+            continue
+
+        order.order_status = order_status
+        order.average_price = average_price
+        order.updated_at = now()
+        changed.append(order)
+
+    PlaceOrder.objects.bulk_update(changed, ["order_status", "average_price", "updated_at"])
+
+    changes = {}
+    for order in changed:
+        changes.setdefault(order.user_id, {})[str(order.id)] = {
+            "order_status": order.order_status,
+            "average_price": order.average_price,
+        }
+    return changes
+
+
+class OrderReconciliationFeed(Feed):
+    """
+    Polls every order of the gateway session with one /iserver/account/orders call and pushes
+    status changes to the owners' ``orders_<user_id>`` groups as "order.status" events.
+    """
+    group_prefix = "order_reconciliation"
+
+    async def poll(self):
+        while True:
+            # The gateway only lists orders after the accounts of the session were requested
+            await self.ibkr.cached_brokerage_accounts()
+            response = await self.ibkr.live_orders()
+            if response.get("success"):
+                changes = await database_sync_to_async(reconcile_orders)(response.get("data", {}).get("orders") or [])
+                for user_id, orders in changes.items():
+                    await self.channel_layer.group_send(order_group_name(user_id), {"type": "order.status", "orders": orders})
+
+            await asyncio.sleep(settings.IBKR_ORDER_RECONCILE_INTERVAL)
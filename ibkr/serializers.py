@@ -2,9 +2,6 @@ import json
 import re
 from datetime import datetime, timedelta
 
-import requests
-
-from django.conf import settings
 from django.utils.timezone import now
 from django_celery_beat.models import IntervalSchedule, PeriodicTask
 from rest_framework import serializers
@@ -193,6 +190,10 @@ class UpperLowerBoundSerializer(serializers.Serializer):
         return data
 
 
+class MultiTimeframeBoundsSerializer(serializers.Serializer):
+    time_steps = serializers.ListField(child=serializers.IntegerField(min_value=1), allow_empty=False)
+
+
 
 class HistoryDataSerializer(serializers.Serializer):
     period = serializers.CharField(required=False)
@@ -204,30 +205,14 @@ class HistoryDataSerializer(serializers.Serializer):
             raise serializers.ValidationError({"error": "Bar is required parameter. Please make sure you send it."})
         return data
 
-    def get_market_data(self, conid, period):
-        base_url = settings.IBKR_BASE_URL + "/iserver/marketdata/history"
-
-        try:
-            data = self.tickle()
-            session_token = data['data']['session']
-        except (KeyError, ValueError):
-            raise serializers.ValidationError("Invalid response from tickle API.")
-
-        params = {
-            'conid': conid,
-            'period': period,
-            'session': session_token
-        }
-        response = requests.get(base_url, params=params, verify=False)
-        if response.status_code == 200:
-            return response.json()
-        elif response.status_code == 429:
+    def get_market_data(self, conid, bar, period):
+        response = IBKRBase().historical_data(conid, bar, period)
+        if response.get('success'):
+            return response.get('data')
+        elif response.get('status') == 429:
             raise serializers.ValidationError("Too many requests. Please try again later.")
         else:
-            try:
-                response.raise_for_status()
-            except requests.exceptions.RequestException as e:
-                raise serializers.ValidationError(f"Market data API error: {str(e)}")
+            raise serializers.ValidationError(f"Market data API error: {response.get('error') or response.get('status')}")
 
     def to_representation(self, instance):
         data = super().to_representation(instance)
@@ -235,7 +220,7 @@ class HistoryDataSerializer(serializers.Serializer):
         period = instance.get('period')
 
         try:
-            market_data = self.get_market_data(conid, period)
+            market_data = self.get_market_data(conid, instance.get('bar'), period)
             data['market_data'] = market_data
         except serializers.ValidationError as e:
             data['market_data_error'] = str(e)
@@ -297,46 +282,9 @@ class UpdateOrderSerializer(serializers.ModelSerializer):
 
         ibkr = IBKRBase()
         order_response = ibkr.modifyOrder(order_id, instance.accountId, order_data)
-        response = None
-        error = None
-        order_status = None
-        if order_response.get('success'):
-            data = order_response.get("data", [])
-            if isinstance(data, list) and data:
-                order_data = data[0]
-                order_id = order_data.get("order_id")
-                reply_id = order_data.get("id")
-                response = order_data
-
-                # Confirm the order if reply_id is present
-                while reply_id:
-                    confirm_response = ibkr.replyOrder(reply_id, {"confirmed": True})
-
-                    if not confirm_response.get("success"):
-                        error = confirm_response.get("error")
-                        break
-
-                    confirm_data = confirm_response.get("data", [])
-                    print(confirm_data, "confirm_data")
-                    if confirm_data and isinstance(confirm_data, list):
-                        confirmed_data = confirm_data[0]
-                        order_confirmed_id = confirmed_data.get("order_id")
-                        if order_confirmed_id:
-                            reply_id = None
-                            response = confirmed_data
-                        else:
-                            reply_id = confirmed_data.get("id")
-                    else:
-                        data = confirm_response.get("data")
-                        if data:
-                            error = data.get('error')
-                        break
-            else:
-                error = order_response.get('data')
-            if response:
-                order_status = response.get("order_status", "")
-        else:
-            error = order_response.get("error")
+        responses, error = ibkr.confirm_order(order_response)
+        response = responses[0] if responses else None
+        order_status = response.get("order_status", "") if response else None
 
         if error:
             raise serializers.ValidationError({"error": "Failed to modify order with IBKR API."})
@@ -1,3 +1,42 @@
-from django.test import TestCase
+from datetime import datetime, time, timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.test import SimpleTestCase
+from django.utils import timezone
+
+from ibkr.models import TimerData
+
+
+class TimerCountdownTests(SimpleTestCase):
+    started_at = timezone.make_aware(datetime(2026, 10, 16, 10, 0))
+
+    def countdown_at(self, minutes):
+        timer = TimerData(
+            timer_value=9, original_timer_value=10, original_time_start=time(10, 0), start_time=time(10, 0),
+            place_order="P", deadline=self.started_at + timedelta(minutes=10),
+        )
+        with mock.patch("ibkr.models.now", return_value=self.started_at + timedelta(minutes=minutes)):
+            timer.sync_countdown()
+        return timer
+
+    def test_countdown_at_start(self):
+        timer = self.countdown_at(0)
+        self.assertEqual((timer.timer_value, timer.start_time, timer.place_order), (10, time(10, 0), "P"))
+
+    def test_countdown_after_one_minute(self):
+        timer = self.countdown_at(1)
+        self.assertEqual((timer.timer_value, timer.start_time, timer.place_order), (9, time(10, 1), "P"))
+
+    def test_countdown_rounds_partial_minutes_up(self):
+        timer = self.countdown_at(1.5)
+        self.assertEqual((timer.timer_value, timer.start_time), (9, time(10, 1)))
+
+    def test_countdown_at_expiry(self):
+        timer = self.countdown_at(10)
+        self.assertEqual((timer.timer_value, timer.start_time, timer.place_order), (0, time(10, 10), "N"))
+
+    def test_placed_orders_stay_placed(self):
+        timer = self.countdown_at(12)
+        timer.place_order = "D"
+        timer.sync_countdown()
+        self.assertEqual(timer.place_order, "D")
@@ -0,0 +1,58 @@
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+
+from core.redis_client import get_redis
+
+TIMER_DEADLINES_KEY = "ibkr:timer_deadlines"
+
+# Atomically take every timer whose deadline has passed, so concurrent schedulers never fire one twice
+_POP_DUE_TIMERS = """
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1])
+if #due > 0 then
+    redis.call('ZREM', KEYS[1], unpack(due))
+end
+return due
+"""
+
+
+def schedule_timer(timer):
+    """
+    Register the deadline of a TimerData row with the timer scheduler (``manage.py run_timer_scheduler``).
+    """
+    get_redis().zadd(TIMER_DEADLINES_KEY, {str(timer.id): timer.deadline.timestamp()})
+
+
+def pop_due_timers(timestamp):
+    return [timer_id.decode() for timer_id in get_redis().eval(_POP_DUE_TIMERS, 1, TIMER_DEADLINES_KEY, timestamp)]
+
+
+def reschedule_timers(timer_ids, timestamp):
+    """
+    Put popped timers back on the schedule, due at ``timestamp``, e.g. when they could not be enqueued.
+    """
+    if timer_ids:
+        get_redis().zadd(TIMER_DEADLINES_KEY, {timer_id: timestamp for timer_id in timer_ids})
+
+
+def next_deadline():
+    """
+    Timestamp of the earliest scheduled deadline, or None when no timer is pending.
+    """
+    first = get_redis().zrange(TIMER_DEADLINES_KEY, 0, 0, withscores=True)
+    return first[0][1] if first else None
+
+
+def place_order_group_name(user_id):
+    return f"place_order_{user_id}"
+
+
+def publish_place_order(timer):
+    """
+    Push the place_order state of ``timer`` to the user's open sockets.
+    """
+    try:
+        async_to_sync(get_channel_layer().group_send)(
+            place_order_group_name(timer.user_id), {"type": "place_order.update", "place_order": timer.place_order}
+        )
+    except Exception as e:
+        print(f"Unable to publish place_order state for timer {timer.id}: {e}")
@@ -2,7 +2,7 @@ from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import (RangeDataView, SymbolDataView, InstrumentListCreateView, AccountSummaryView, \
     AuthStatusView, OnboardingView, SystemDataView, TimerDataViewSet, GetHistoryDataView, PlaceOrderView, IBKRTokenView,
-                    DashBoardView)
+                    DashBoardView, MultiTimeframeRangeView)
 
 router = DefaultRouter()
 router.register("onboarding", OnboardingView, "onboarding")
@@ -18,6 +18,7 @@ urlpatterns = [
     path('history_data',GetHistoryDataView.as_view(), name='history_data'),
     path('dashboard', DashBoardView.as_view(), name="dashboard-view"),
     path('range',RangeDataView.as_view(),name='Range'),
+    path('range/all', MultiTimeframeRangeView.as_view(), name='range_all'),
     # path('close-position/', ClosePositionView.as_view(), name='Range'),
     path('get-token', IBKRTokenView.as_view(), name="token"),
     path("", include(router.urls)),
@@ -1,18 +1,17 @@
 from datetime import datetime
 
-from django.db.models import Max, IntegerField
-from django.db.models.functions import Cast, Substr
-
 from core.exceptions import IBKRValueError
+from ibkr.contract_cache import contract_resolver
 from ibkr.models import PlaceOrder, Strikes
+from ibkr.order_ids import order_id_allocator
 
 
 def fetch_bounds_from_json(json_data):
     highest_prices = [entry.get('h', 0) for entry in json_data.get('data', {})]
     lowest_prices = [entry.get('l', 0) for entry in json_data.get('data', {})]
 
-    max_highest_price = max(highest_prices)
-    min_lowest_price = min(lowest_prices)
+    max_highest_price = max(highest_prices, default=None)
+    min_lowest_price = min(lowest_prices, default=None)
 
     response = {
         "upper_bound": max_highest_price,
@@ -50,110 +49,95 @@ def calculate_strike_range_and_save(strikes_response, last_day_price, contract_i
 
     # validate call and put strikes
     for strike in call_strikes:
-        strike_info = ibkr.strike_info(contract_id, strike, 'C', month)
-        if not strike_info.get("success"):
-            continue
-        for obj in strike_info["data"]:
-            maturity_date = obj.get("maturityDate")
-            if maturity_date and int(maturity_date) == int(datetime.now().strftime("%Y%m%d")):
-                Strikes.objects.update_or_create(
-                    contract_id=contract_id,
-                    user_id=user_id,
-                    strike_price=strike,
-                    right= "C",
-                    month=month,
-                    defaults={
-                        'last_price': last_day_price,
-                        'strike_info': obj,
-
+        contract = contract_resolver.resolve(ibkr, contract_id, strike, 'C', month)
+        if contract:
+            Strikes.objects.update_or_create(
+                contract_id=contract_id,
+                user_id=user_id,
+                strike_price=strike,
+                right="C",
+                month=month,
+                defaults={
+                    'last_price': last_day_price,
+                    'strike_info': contract,
                 }
-                )
+            )
         today_call_strikes += 1
         if today_call_strikes == 14:
             break
 
     for strike in put_strikes:
-        strike_info = ibkr.strike_info(contract_id, strike, 'P', month)
-        if not strike_info.get("success"):
-            continue
-        for obj in strike_info["data"]:
-            maturity_date = obj.get("maturityDate")
-            if maturity_date and int(maturity_date) == int(datetime.now().strftime("%Y%m%d")):
-                Strikes.objects.update_or_create(
-                    contract_id=contract_id,
-                    user_id=user_id,
-                    strike_price=strike,
-                    right="P",
-                    month=month,
-                    defaults={
-                        'last_price': last_day_price,
-                        'strike_info': obj,
-
+        contract = contract_resolver.resolve(ibkr, contract_id, strike, 'P', month)
+        if contract:
+            Strikes.objects.update_or_create(
+                contract_id=contract_id,
+                user_id=user_id,
+                strike_price=strike,
+                right="P",
+                month=month,
+                defaults={
+                    'last_price': last_day_price,
+                    'strike_info': contract,
                 }
-                )
+            )
         today_put_strikes += 1
         if today_put_strikes == 14:
             break
 
 
 
-def save_order(data_dict):
+def save_orders(data_dicts):
     """
-     Save the order in local db placed by the user.
+     Save the orders placed by the user in local db in a single query.
 
-     :param data_dict: Dictionary containing data that needs to be saved
+     :param data_dicts: List of dictionaries containing data that needs to be saved
     """
-    return PlaceOrder.objects.create(**data_dict)
+    return PlaceOrder.objects.bulk_create([PlaceOrder(**data_dict) for data_dict in data_dicts])
 
 
-def generate_customer_order_id():
+def generate_customer_order_ids(count=1):
     """
-    Generates a new customer_order_id by incrementing the last saved ID in the database.
+    Allocates ``count`` new unique customer_order_ids.
     Format: order-id-1, order-id-2, etc.
     """
+    return order_id_allocator.allocate(count)
 
-    last_order = PlaceOrder.objects.annotate(
-        numeric_id=Cast(Substr('customer_order_id', 10), IntegerField())
-    ).aggregate(max_id=Max('numeric_id'))['max_id']
-
-    if last_order:
-        next_order_num = last_order + 1
-        new_order_id = f"order-id-{next_order_num}"
-
-    else:
-        new_order_id = "order-id-1"
+def format_bar(bar, index, volume_factor=1):
+    """
+    Convert one /iserver/marketdata/history bar to the chart format.
+    """
+    timestamp_ms = bar["t"]
+    timestamp_s = timestamp_ms / 1000
+    utc_datetime = datetime.utcfromtimestamp(timestamp_s)
+    iso_date = utc_datetime.strftime('%Y-%m-%dT%H:%M:%S') + 'Z'
+
+    return {
+        "date": iso_date,
+        "open": round(bar["o"], 2),
+        "high": round(bar["h"], 2),
+        "low": round(bar["l"], 2),
+        "close": round(bar["c"], 2),
+        "volume": round(bar["v"] * volume_factor),
+        "split": "",
+        "dividend": "",
+        "absoluteChange": "",
+        "percentChange": "",
+        "idx": {
+            "index": index,
+            "level": 12,
+            "date": iso_date
+        }
+    }
 
-    return new_order_id
 
 def transform_ibkr_data(api_response, conid=None):
     data = api_response.pop('data', [])
-    transformed_data = []
     highest_closing_prices = [entry.get('c', 0) for entry in data]
     closing_price = max(highest_closing_prices)
 
-    for index, bar in enumerate(data):
-        timestamp_ms = bar["t"]
-        timestamp_s = timestamp_ms / 1000
-        utc_datetime = datetime.utcfromtimestamp(timestamp_s)
-        iso_date = utc_datetime.strftime('%Y-%m-%dT%H:%M:%S') + 'Z'
-
-        transformed_data.append({
-            "date": iso_date,
-            "open": round(bar["o"], 2),
-            "high": round(bar["h"], 2),
-            "low": round(bar["l"], 2),
-            "close": round(bar["c"], 2),
-            "volume": round(bar["v"] * api_response.get("volumeFactor", 1)),
-            "split": "",
-            "dividend": "",
-            "absoluteChange": "",
-            "percentChange": "",
-            "idx": {
-                "index": index,
-                "level": 12,
-                "date": iso_date
-            }
-        })
+    transformed_data = [
+        format_bar(bar, index, api_response.get("volumeFactor", 1)) for index, bar in enumerate(data)
+    ]
     api_response['data'] = transformed_data
     api_response['conId'] = conid
     api_response['at_Close'] = closing_price
@@ -7,10 +7,8 @@ import numpy as np
 
 from collections import defaultdict
 
-from django.conf import settings
 from django.utils import timezone
 from django.utils.timezone import now
-from django_celery_beat.models import IntervalSchedule, PeriodicTask
 from drf_spectacular.utils import extend_schema, OpenApiParameter
 from rest_framework.decorators import action
 from rest_framework.permissions import AllowAny, IsAuthenticated
@@ -25,9 +23,12 @@ from ibkr.models import OnBoardingProcess, TradingStatus, Instrument, TimerData,
 from ibkr.serializers import UpperLowerBoundSerializer, TimerDataSerializer, OnboardingSerailizer, SystemDataSerializer, \
     TradingStatusSerializer, InstrumentSerializer, TimerDataListSerializer, \
     SystemDataListSerializer, HistoryDataSerializer, PlaceOrderSerializer, PlaceOrderListSerializer, \
-    UpdateOrderSerializer, DashBoardSerializer
+    UpdateOrderSerializer, DashBoardSerializer, MultiTimeframeBoundsSerializer
 from ibkr.utils import fetch_bounds_from_json, transform_ibkr_data
+from ibkr.bar_store import bar_store
+from ibkr.bounds import BASE_BAR, BASE_PERIOD, multi_timeframe_bounds, price_bounds
 from ibkr.tasks import place_orders_task
+from ibkr.timers import schedule_timer, publish_place_order
 
 
 @extend_schema(tags=["IBKR"])
@@ -43,7 +44,7 @@ class AuthStatusView(APIView, IBKRBase):
 
     def get(self, request):
         try:
-            response = self.auth_status()
+            response = self.cached_auth_status()
             user = request.user
 
             if response.get('success'):
@@ -51,20 +52,13 @@ class AuthStatusView(APIView, IBKRBase):
                     onboarding_process, _ = OnBoardingProcess.objects.update_or_create(
                         user=user, defaults={"authenticated": True}
                     )
-                    if onboarding_process.periodic_task:
-                        onboarding_process.periodic_task.enabled = True
-                        onboarding_process.periodic_task.save()
 
                     return Response(response.get('data'), status=status.HTTP_200_OK)
 
                 else:
-                    # Disable the task if the user is not authenticated with client portal
                     onboarding_process, _ = OnBoardingProcess.objects.update_or_create(
                         user=user, defaults={"authenticated": False}
                     )
-                    if onboarding_process.periodic_task:
-                        onboarding_process.periodic_task.enabled = False
-                        onboarding_process.periodic_task.save()
 
             return Response(
                 {"error": response.get("error")}, status=response.get("status")
@@ -119,7 +113,7 @@ class OnboardingView(viewsets.ModelViewSet):
         Retrieve the onboarding details for the authenticated user.
         """
         ibkr = IBKRBase()
-        authentication = ibkr.auth_status()
+        authentication = ibkr.cached_auth_status()
         if not authentication.get('success'):
             authenticated = False
         elif authentication.get('success') and not authentication.get('data').get('authenticated'):
@@ -132,10 +126,6 @@ class OnboardingView(viewsets.ModelViewSet):
             if not instance.authenticated:
                 instance.authenticated = authenticated
                 instance.save()
-
-                periodic_task = instance.periodic_task
-                periodic_task.enabled = True
-                periodic_task.save()
         except OnBoardingProcess.DoesNotExist:
             return Response(
                 {
@@ -166,7 +156,7 @@ class SystemDataView(viewsets.ModelViewSet):
 
     def list(self, request, *args, **kwargs):
         ibkr = IBKRBase()
-        authentication = ibkr.auth_status()
+        authentication = ibkr.cached_auth_status()
         if not authentication.get('success'):
             authenticated = False
         elif authentication.get('success') and not authentication.get('data').get('authenticated'):
@@ -184,7 +174,7 @@ class SystemDataView(viewsets.ModelViewSet):
 
     def create(self, request, *args, **kwargs):
         ibkr = IBKRBase()
-        authentication = ibkr.auth_status()
+        authentication = ibkr.cached_auth_status()
         if not authentication.get('success'):
             authenticated = False
         elif authentication.get('success') and not authentication.get('data').get('authenticated'):
@@ -204,7 +194,7 @@ class SystemDataView(viewsets.ModelViewSet):
     def update(self, request, *args, **kwargs):
         try:
             ibkr = IBKRBase()
-            authentication = ibkr.auth_status()
+            authentication = ibkr.cached_auth_status()
             if not authentication.get('success'):
                 authenticated = False
             elif authentication.get('success') and not authentication.get('data').get('authenticated'):
@@ -306,26 +296,11 @@ class TimerDataViewSet(viewsets.ModelViewSet):
         data['system_data'] = system_instance.id
         serializer = TimerDataSerializer(data=request.data)
         if serializer.is_valid():
-            timer = serializer.save(user=request.user)
-
-            current_date = timezone.now().strftime("%Y-%m-%d")
-            task_name = f"Update Timer for {timer.id} - {request.user.username} - {current_date}"
-
-            # Create a periodic task for the timer
-            schedule, _ = IntervalSchedule.objects.get_or_create(
-                every=1,
-                period=IntervalSchedule.MINUTES
-            )
-            task = PeriodicTask.objects.create(
-                interval=schedule,
-                name=task_name,
-                task="ibkr.tasks.update_timer"
-            )
-
-            timer.place_order = "P"
-            timer.save()
-            task.args = json.dumps([str(timer.id), str(task.id)])
-            task.save()
+            # The countdown runs against an absolute deadline, run_timer_scheduler fires its expiry
+            deadline = now() + timedelta(minutes=serializer.validated_data.get('original_timer_value'))
+            timer = serializer.save(user=request.user, deadline=deadline, place_order="P")
+            schedule_timer(timer)
+            publish_place_order(timer)
 
             return Response(serializer.data, status=201)
         return Response(serializer.errors, status=400)
@@ -346,7 +321,7 @@ class SymbolDataView(APIView, IBKRBase):
             symbol = request.query_params.get('symbol')
             if not symbol:
                 return Response({'error': 'Symbol parameter is required'}, status=status.HTTP_400_BAD_REQUEST)
-            response = self.auth_status()
+            response = self.cached_auth_status()
             if response.get('success'):
                 if response.get('data').get('authenticated'):
                     search_spy_data = self.get_spy_conId(symbol)
@@ -376,27 +351,10 @@ class RangeDataView(APIView, IBKRBase):
         """
         Fetch market data using the 'bar' parameter.
         """
-        base_url = settings.IBKR_BASE_URL + "/iserver/marketdata/history"
-
-        try:
-            data = self.tickle()
-            session_token = data['data']['session']
-        except (KeyError, ValueError):
-            raise IBKRAPIError("Failed to retrieve session token from Tickle API response.")
-        params = {
-            'conid': conid,
-            'period': '2w',
-            'bar': bar,
-            'session': session_token
-        }
-        try:
-            response = requests.get(base_url, params=params, verify=False)
-            if response.status_code == 200:
-                return response.json()  # Return raw JSON data
-            else:
-                raise IBKRAPIError(f"Failed to fetch market data. Status code: {response.status_code}")
-        except requests.exceptions.RequestException as e:
-            raise IBKRAPIError(f"Market data API error: {str(e)}")
+        history_data = bar_store.history(self, conid, bar, '2w')
+        if not history_data.get('success'):
+            raise IBKRAPIError(f"Failed to fetch market data. Status code: {history_data.get('status')}")
+        return history_data.get('data')  # Return raw JSON data
 
     def process_market_data(self, market_data, num_days):
         """
@@ -411,24 +369,8 @@ class RangeDataView(APIView, IBKRBase):
             except Exception as e:
                 return {"error": "Unable to calculate the upper and lower bound with the given timeframe."}
 
-            closing_prices = df['c']
-
-            closing_prices = closing_prices.tail(num_days)
-
-            daily_returns = closing_prices.pct_change().dropna()
-
-            std_dev_return = daily_returns.std()
-
-
             # Compute the expected price range
-            latest_price = closing_prices.iloc[-1]
-            range_upper = latest_price * (1 + std_dev_return)
-            range_lower = latest_price * (1 - std_dev_return)
-
-            return {
-                "upper_bound": round(range_upper, 2),
-                "lower_bound": round(range_lower, 2)
-            }
+            return price_bounds(df['c'], num_days)
         else:
             return {"error": "No data found for the given time."}
 
@@ -467,6 +409,40 @@ class RangeDataView(APIView, IBKRBase):
 
 
 
+@extend_schema(tags=["IBKR"])
+class MultiTimeframeRangeView(APIView, IBKRBase):
+    """
+    Upper and lower bounds for every time frame and every requested number of time steps in one response.
+    """
+    permission_classes = [IsAuthenticated]
+    serializer_class = MultiTimeframeBoundsSerializer
+    http_method_names = ['post']
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        IBKRBase.__init__(self)
+
+    def post(self, request):
+        serializer = self.serializer_class(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        system_data_obj = SystemData.objects.filter(user=request.user).first()
+        if not system_data_obj:
+            return Response({'error': "No System Data found for the logged-in user."}, status=status.HTTP_404_NOT_FOUND)
+
+        conid = system_data_obj.ticker_data.get('conid')
+        history_data = bar_store.history(self, conid, BASE_BAR, BASE_PERIOD)
+        if not history_data.get('success'):
+            return Response({"error": f"Failed to fetch market data. Status code: {history_data.get('status')}"},
+                            status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+        bounds = multi_timeframe_bounds(history_data.get('data'), serializer.validated_data['time_steps'])
+        if not bounds:
+            return Response({"error": "No data found for the given time."}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(bounds, status=status.HTTP_200_OK)
+
+
 @extend_schema(tags=["History Data"])
 class GetHistoryDataView(APIView, IBKRBase):
     permission_classes = [IsAuthenticated]
@@ -483,7 +459,7 @@ class GetHistoryDataView(APIView, IBKRBase):
             conid = serializer.validated_data['conid']
             period = serializer.validated_data.get('period')
             bar = serializer.validated_data['bar']
-            history_data = self.historical_data(conid, bar, period)
+            history_data = bar_store.history(self, conid, bar, period)
             if history_data.get('success'):
                 bound_data = fetch_bounds_from_json(history_data.get('data'))
             else:
@@ -517,7 +493,7 @@ class PlaceOrderView(viewsets.ModelViewSet, IBKRBase):
         return self.serializer_class_update
 
     def _check_authentication(self):
-        authentication = self.auth_status()
+        authentication = self.cached_auth_status()
         if not authentication.get('success'):
             authenticated = False
         elif authentication.get('success') and not authentication.get('data').get('authenticated'):
@@ -581,7 +557,7 @@ class PlaceOrderView(viewsets.ModelViewSet, IBKRBase):
         if order.is_cancelled:
             return Response({"error": f"Order with id {order.id} is already cancelled. "})
         account = None
-        acc_response = self.brokerage_accounts()
+        acc_response = self.cached_brokerage_accounts()
         if acc_response.get('success'):
             accounts = acc_response.get('data', {}).get('accounts')
             if accounts: